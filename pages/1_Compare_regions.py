@@ -0,0 +1,104 @@
+# Libraries
+
+import streamlit as st
+
+from zensus22 import REGION_LEVEL_TRANSLATIONS, REGION_LEVELS, download, load_wohnungen, region_index
+from zensus22.charts import CHARTS, CHARTS_BY_ID, METRICS, SECTIONS, build_comparison_figure
+from zensus22.facts import fact_table
+from zensus22.hierarchy import hierarchy
+from zensus22.loader import dataset_version
+
+# Streamlit set up
+st.set_page_config(page_title="Compare regions - Housing statistics 2022", layout = "wide")
+
+# Load data (shared with the main page)
+df_wohnungen = load_wohnungen()
+index = region_index(df_wohnungen)
+facts = fact_table(df_wohnungen)
+
+
+# Sidebar
+st.sidebar.header("Compare regions")
+st.sidebar.markdown("Choose a region level and several regions to compare their housing statistics side by side.")
+
+selected_region_level = st.sidebar.selectbox(
+    "Choose a region level:",
+    options=REGION_LEVELS, index=1, format_func=lambda x: f"{REGION_LEVEL_TRANSLATIONS[x]} ({x})")
+
+region = index.regions[selected_region_level]
+
+# Districts can also be selected as all districts of one state
+selection_mode = "Pick regions"
+if selected_region_level == REGION_LEVELS[2]:
+    selection_mode = st.sidebar.radio("Select regions by:", ["Pick regions", "All districts of a state"])
+
+if selection_mode == "Pick regions":
+    selected_regions = st.sidebar.multiselect(
+        "Choose regions:", region, default=region[:3])
+
+    if not selected_regions:
+        st.info("Choose at least one region in the sidebar.")
+        st.stop()
+
+    # Row positions of the selection; every table and chart below is one take over these
+    region_ids = [index.position(selected_region_level, r) for r in selected_regions]
+else:
+    tree = hierarchy(df_wohnungen)
+    selected_land = st.sidebar.selectbox("Choose a state:", index.regions[REGION_LEVELS[1]])
+    region_ids = tree.children_of(index.position(REGION_LEVELS[1], selected_land)).tolist()
+
+    if not region_ids:
+        st.info("No districts are linked to this state. The workbook needs a region key column (e.g. ARS).")
+        st.stop()
+
+# Set title
+st.title(f"Housing statistics: comparison of {len(region_ids)} regions (2022)")
+
+
+###### CHARTS & METRICS ######
+
+# Metrics
+
+stats = df_wohnungen.iloc[region_ids][["Region"] + list(METRICS)]
+stats["Region"] = stats["Region"].astype(str)
+
+st.dataframe(
+    stats, hide_index=True, width="stretch",
+    column_config={col: st.column_config.NumberColumn(label.rstrip("*"), format=fmt)
+                   for col, (label, fmt) in METRICS.items()})
+
+# Download of the selection or the whole level, with the chosen metrics and breakdowns, encoded only when clicked
+st.sidebar.subheader("Download")
+download_rows = st.sidebar.radio("Rows:", ["Selected regions", "All regions of this level"])
+download_dimensions = st.sidebar.multiselect(
+    "Columns:", download.DIMENSIONS, default=download.DIMENSIONS,
+    format_func=lambda x: "Headline metrics" if x == "metrics" else CHARTS_BY_ID[x].title.rsplit("by ", 1)[-1].capitalize())
+download_format = st.sidebar.radio("Format:", list(download.FORMATS), horizontal=True)
+download_selection = ({"region_ids": region_ids} if download_rows == "Selected regions"
+                      else {"levels": [selected_region_level]})
+st.sidebar.download_button(
+    "Download", file_name=f"zensus22_comparison.{download_format}",
+    mime=download.FORMATS[download_format], on_click="ignore", disabled=not download_dimensions,
+    data=lambda: download.to_bytes(df_wohnungen, dataset_version(), download_format,
+                                   dimensions=download_dimensions, **download_selection))
+
+
+# Charts: one tab per section, only the open tab is computed
+
+@st.fragment
+def render_tabs():
+    tabs = st.tabs(SECTIONS, key="compare_section", on_change="rerun")
+    for section, tab in zip(SECTIONS, tabs):
+        if not tab.open:
+            continue
+        with tab:
+            col1, spacer, col2 = st.columns([1, 0.2, 1])
+            for spec in CHARTS:
+                if spec.section != section:
+                    continue
+                with col1 if spec.column == 1 else col2:
+                    fig = build_comparison_figure(spec, facts.rows(region_ids, spec.id))
+                    st.plotly_chart(fig, width="stretch")
+
+
+render_tabs()
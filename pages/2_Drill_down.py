@@ -0,0 +1,85 @@
+# Libraries
+
+import plotly.express as px
+import streamlit as st
+
+from zensus22 import REGION_LEVEL_TRANSLATIONS, REGION_LEVELS, load_wohnungen, region_index
+from zensus22.charts import METRICS, TEMPLATE
+from zensus22.hierarchy import hierarchy
+
+# Streamlit set up
+st.set_page_config(page_title="Drill-down - Housing statistics 2022", layout = "wide")
+
+# Load data (shared with the main page)
+df_wohnungen = load_wohnungen()
+index = region_index(df_wohnungen)
+tree = hierarchy(df_wohnungen)
+
+names = df_wohnungen["Region"].astype(str).to_numpy()
+levels = df_wohnungen["Regionalebene"].astype(str).to_numpy()
+
+
+# Sidebar: walk down from Germany to a Land
+st.sidebar.header("Drill-down")
+st.sidebar.markdown("Start from Germany and open a state to see how its districts are distributed.")
+
+bund, land = REGION_LEVELS[0], REGION_LEVELS[1]
+root_id = index.position(bund, index.regions[bund][0])
+
+land_ids = tree.children_of(root_id)
+selected_id = st.sidebar.selectbox(
+    "Choose a state (or Germany):",
+    options=[root_id] + land_ids.tolist(), format_func=lambda i: names[i])
+
+child_ids = tree.children_of(selected_id)
+parent_id = tree.parent_of(selected_id)
+
+# Set title
+st.title(f"Housing statistics for {names[selected_id]} (2022)")
+if parent_id is not None:
+    st.caption(f"{names[parent_id]} › {names[selected_id]}")
+
+if len(child_ids) == 0:
+    st.info("No subregions are linked to this region. The workbook needs a region key column (e.g. ARS) to link districts to their state.")
+    st.stop()
+
+child_level = levels[child_ids[0]]
+st.subheader(f"Distribution across {len(child_ids)} {REGION_LEVEL_TRANSLATIONS[child_level].lower()} regions")
+
+
+###### CHARTS & METRICS ######
+
+# Metrics of the region itself next to the precomputed spread of its children
+summary = tree.summary(selected_id)
+children = df_wohnungen.iloc[child_ids][["Region"] + list(METRICS)]
+children["Region"] = children["Region"].astype(str)
+
+col1, spacer, col2 = st.columns([1, 0.2, 1])
+
+for i, (col, (label, fmt)) in enumerate(METRICS.items()):
+    with col1 if i % 2 == 0 else col2:
+        value = df_wohnungen[col].iloc[selected_id]
+        st.metric(label, fmt % value,
+                  help=f"Median across subregions: {fmt % summary.loc[col, 'median']} "
+                       f"(min {fmt % summary.loc[col, 'min']}, max {fmt % summary.loc[col, 'max']})")
+
+        fig = px.strip(children, x=col, hover_name="Region", template=TEMPLATE,
+                       labels={col: label.rstrip("*")}, height=220)
+        fig.add_vline(x=value, line_dash="dash", annotation_text=names[selected_id])
+        fig.add_vline(x=summary.loc[col, "median"], line_dash="dot", line_color="grey",
+                      annotation_text="median", annotation_position="bottom right")
+        fig.update_layout(margin=dict(t=20, b=20))
+        st.plotly_chart(fig, width="stretch")
+
+
+# Precomputed aggregates over the subregions
+st.subheader("Summary across subregions")
+st.dataframe(
+    summary.rename(index={col: label.rstrip("*") for col, (label, _) in METRICS.items()}),
+    width="stretch")
+
+st.subheader("Subregions")
+st.dataframe(
+    children, hide_index=True, width="stretch",
+    column_config={col: st.column_config.NumberColumn(label.rstrip("*"), format=fmt)
+                   for col, (label, fmt) in METRICS.items()})
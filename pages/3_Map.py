@@ -0,0 +1,78 @@
+# Libraries
+
+import streamlit as st
+
+from zensus22 import REGION_LEVEL_TRANSLATIONS, REGION_LEVELS, load_wohnungen, region_index
+from zensus22.charts import METRICS, TEMPLATE, lean_figure
+from zensus22.facts import fact_table
+from zensus22.geo import DETAIL_LEVELS, GEO_DIR, GEO_FILES, available
+from zensus22.hierarchy import KEY_PREFIX, key_column, normalize_key
+from zensus22.mapview import choropleth
+from zensus22.ranking import INDICATORS
+
+# Streamlit set up
+st.set_page_config(page_title="Map - Housing statistics 2022", layout = "wide")
+
+# Load data (shared with the main page)
+df_wohnungen = load_wohnungen()
+index = region_index(df_wohnungen)
+facts = fact_table(df_wohnungen)
+
+
+# Sidebar
+st.sidebar.header("Map")
+st.sidebar.markdown("Color every state or district by a headline metric or by the share of one category.")
+
+map_levels = [level for level in REGION_LEVELS if level in GEO_FILES]
+selected_region_level = st.sidebar.selectbox(
+    "Choose a region level:",
+    options=map_levels, format_func=lambda x: f"{REGION_LEVEL_TRANSLATIONS[x]} ({x})")
+
+key_col = key_column(df_wohnungen)
+if not available(selected_region_level) or key_col is None:
+    st.info(f"The map needs the boundary file {GEO_DIR.name}/{GEO_FILES[selected_region_level]} "
+            "in the data folder and a region key column (e.g. ARS) in the workbook.")
+    st.stop()
+
+# Indicators: headline metrics and the share of every chart category
+indicators = INDICATORS
+
+# Regions of the level and their keys, matching the feature ids of the boundary file
+region_ids = [index.position(selected_region_level, r) for r in index.regions[selected_region_level]]
+regions = df_wohnungen["Region"].astype(str).to_numpy()[region_ids]
+keys = [normalize_key(k, KEY_PREFIX[selected_region_level]) for k in df_wohnungen[key_col].to_numpy()[region_ids]]
+
+
+# Map: only this fragment reruns when the indicator or detail changes. The
+# geometry is simplified once per process and detail level and sent to the
+# browser once per session; a new indicator only sends the values
+
+@st.fragment
+def render_map():
+    import plotly.graph_objects as go
+
+    col1, col2 = st.columns([3, 1])
+    indicator = col1.selectbox("Color by:", list(indicators), format_func=indicators.get)
+    detail = col2.select_slider("Detail:", list(DETAIL_LEVELS), value="medium")
+
+    if ":" in indicator:
+        dimension, category = indicator.split(":")
+        values = facts.share(region_ids, dimension, int(category))
+        unit = "%"
+    else:
+        values = df_wohnungen[indicator].to_numpy()[region_ids]
+        unit = METRICS[indicator][1].rsplit(" ", 1)[-1].replace("%%", "%")
+
+    fig = go.Figure(go.Choropleth(
+        locations=keys, z=values, text=regions,
+        colorscale="Blues", marker_line_width=0.3, marker_line_color="white",
+        colorbar=dict(title=unit),
+        hovertemplate=f"<b>%{{text}}</b><br>%{{z:.2f}} {unit}<extra></extra>"))
+    fig.update_geos(fitbounds="locations", visible=False)
+    fig.update_layout(template=TEMPLATE, height=750, margin=dict(t=10, b=10, l=0, r=0),
+                      uirevision=selected_region_level)
+    choropleth(lean_figure(fig, "choropleth"), selected_region_level, detail)
+
+
+st.title(f"{REGION_LEVEL_TRANSLATIONS[selected_region_level]} map (2022)")
+render_map()
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from zensus22 import loader
+from zensus22.charts import ALL_COLUMNS, METRICS
+from zensus22.synthetic import write_workbook
+
+
+@pytest.fixture
+def census_frame():
+    """Build a small prepared frame: one row per level, every metric and count column set to ``fill``."""
+
+    def build(levels, fill=1.0, **columns):
+        n = len(levels)
+        data = {"Region": pd.Categorical([f"Region {i}" for i in range(n)]),
+                "Regionalebene": pd.Categorical(levels)}
+        for col in list(METRICS) + ALL_COLUMNS:
+            data[col] = np.full(n, fill, dtype="float64")
+        for col, values in columns.items():
+            data[col] = np.asarray(values, dtype="float64")
+        return pd.DataFrame(data)
+
+    return build
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    """Small synthetic workbook in a temporary directory, dropped from the loader cache afterwards."""
+    path = write_workbook(tmp_path / "Data_wohnungen.xlsx", scale=0.04)
+    yield path
+    loader.invalidate(path)
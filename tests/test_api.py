@@ -0,0 +1,48 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from zensus22 import api, loader
+from zensus22.api import _not_modified
+from zensus22.synthetic import write_workbook
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    workbook = write_workbook(tmp_path / "Data_wohnungen.xlsx", scale=0.04)
+    monkeypatch.setattr(api, "load_wohnungen", lambda: loader.load_wohnungen(workbook))
+    yield TestClient(api.app)
+    loader.invalidate(workbook)
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"x", W/"abc" ,"y"', True),
+    ("*", True),
+    ('"ab"', False),
+    ("abc", False),
+])
+def test_not_modified(header, expected):
+    assert _not_modified(header, '"abc"') is expected
+
+
+def test_etag_and_304(client):
+    first = client.get("/regions/1/metrics")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == api.CACHE_CONTROL
+
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        cached = client.get("/regions/1/metrics", headers={"If-None-Match": header})
+        assert cached.status_code == 304
+        assert cached.headers["etag"] == etag
+        assert cached.content == b""
+
+    assert client.get("/regions/1/metrics", headers={"If-None-Match": '"other"'}).status_code == 200
+    # One version for the whole dataset
+    assert client.get("/regions?level=Land").headers["etag"] == etag
+
+
+def test_unknown_region(client):
+    assert client.get("/regions/9999/metrics").status_code == 404
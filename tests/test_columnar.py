@@ -0,0 +1,68 @@
+import pandas as pd
+
+from zensus22 import columnar, loader
+from zensus22.charts import ALL_COLUMNS
+from zensus22.columnar import cache_path, compile_workbook, read_cache, source_hash
+from zensus22.loader import _content_hash, invalidate, load_wohnungen, suppressed_cells
+from zensus22.synthetic import write_workbook
+
+
+def test_compile_once_per_content(workbook):
+    path, built = compile_workbook(workbook)
+    assert built and path == cache_path(workbook)
+    assert source_hash(path) == _content_hash(workbook)
+    assert compile_workbook(workbook) == (path, False)
+
+    write_workbook(workbook, scale=0.04, seed=1)
+    assert compile_workbook(workbook) == (path, True)
+    assert source_hash(path) == _content_hash(workbook)
+
+
+def test_stale_cache_is_not_read(workbook):
+    compile_workbook(workbook)
+    assert read_cache(workbook, _content_hash(workbook)) is not None
+    assert read_cache(workbook, "0" * 64) is None
+
+
+def test_cold_load_attaches_to_the_cache(workbook, monkeypatch):
+    parsed = load_wohnungen(workbook)
+    invalidate(workbook)
+
+    def no_parse(path):
+        raise AssertionError("workbook parsed although the cache is current")
+
+    monkeypatch.setattr(loader, "read_workbook", no_parse)
+    attached = load_wohnungen(workbook)
+    assert attached is not parsed
+    assert attached["Region"].astype(str).tolist() == parsed["Region"].astype(str).tolist()
+    assert attached["QMMIETE"].equals(parsed["QMMIETE"])
+
+
+def test_unreadable_file_is_stale(tmp_path):
+    broken = tmp_path / "broken.feather"
+    broken.write_bytes(b"not arrow")
+    assert source_hash(broken) is None
+    assert source_hash(tmp_path / "missing.feather") is None
+
+
+def test_other_cache_version_is_stale(workbook, monkeypatch):
+    path, _ = compile_workbook(workbook)
+    monkeypatch.setattr(columnar, "CACHE_VERSION", columnar.CACHE_VERSION + 1)
+    assert source_hash(path) is None
+    assert read_cache(workbook, _content_hash(workbook)) is None
+    assert compile_workbook(workbook) == (path, True)
+    assert source_hash(path) == _content_hash(workbook)
+
+
+def test_counts_and_suppressed_cells_survive_the_cache(workbook):
+    parsed = load_wohnungen(workbook)
+    suppressed = suppressed_cells(parsed)
+    invalidate(workbook)
+    attached = load_wohnungen(workbook)
+
+    count = attached[ALL_COLUMNS[0]]
+    assert isinstance(count.dtype, pd.ArrowDtype) and count.dtype.pyarrow_dtype.bit_width <= 32
+    assert suppressed and suppressed_cells(attached).keys() == suppressed.keys()
+    for col, rows in suppressed.items():
+        assert suppressed_cells(attached)[col].tolist() == rows.tolist()
+        assert attached[col].iloc[rows].isna().all()
@@ -0,0 +1,76 @@
+import io
+
+import pandas as pd
+import pytest
+
+from zensus22 import download
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(download, "CACHE_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def df(census_frame):
+    return census_frame(["Bund", "Land", "Land"], QMMIETE=[1.0, 2.0, 3.0])
+
+
+def read_csv(data):
+    return pd.read_csv(io.BytesIO(data))
+
+
+def test_selection(df):
+    data = download.to_bytes(df, "v1", levels=["Land"], dimensions=["metrics"])
+    frame = read_csv(data)
+    assert frame.columns.tolist() == ["Region", "Regionalebene", "QMMIETE", "LEQ", "ETQ", "FLAECHE"]
+    assert frame["QMMIETE"].tolist() == [2.0, 3.0]
+
+    frame = read_csv(download.to_bytes(df, "v1", region_ids=[2, 0], dimensions=["nutzung"]))
+    assert frame["Region"].tolist() == ["Region 0", "Region 2"]
+    assert all(col.startswith("NUTZUNG__") for col in frame.columns[2:])
+
+
+def test_batches_give_the_same_file(df, monkeypatch):
+    whole = download.to_bytes(df, "v1", "parquet")
+    monkeypatch.setattr(download, "BATCH_ROWS", 1)
+    monkeypatch.setattr(download, "CACHE_DIR", download.CACHE_DIR / "batched")
+    batched = pd.read_parquet(io.BytesIO(download.to_bytes(df, "v1", "parquet")))
+    pd.testing.assert_frame_equal(batched, pd.read_parquet(io.BytesIO(whole)))
+    assert len(batched) == 3
+
+
+@pytest.mark.parametrize("selection", [{"fmt": "xls"}, {"levels": ["Gemeinde"]}, {"region_ids": [3]},
+                                       {"dimensions": ["unknown"]}])
+def test_invalid_selection_fails_before_streaming(df, selection):
+    with pytest.raises(KeyError):
+        download.stream(df, "v1", **selection)
+
+
+def test_repeated_query_is_served_from_the_cache(df, cache_dir, monkeypatch):
+    first = download.to_bytes(df, "v1", levels=["Land"])
+    assert [p.suffix for p in cache_dir.iterdir()] == [".csv"]
+
+    def fail(*args):
+        raise AssertionError("encoded again")
+
+    monkeypatch.setattr(download, "_encode", fail)
+    assert download.to_bytes(df, "v1", levels=["Land"]) == first
+    # Another dataset version is not served from the cache
+    with pytest.raises(AssertionError):
+        download.to_bytes(df, "v2", levels=["Land"])
+
+
+def test_interrupted_download_leaves_no_files(df, cache_dir):
+    chunks = download.stream(df, "v1", "parquet")
+    next(chunks)
+    chunks.close()
+    assert list(cache_dir.iterdir()) == []
+
+
+def test_cache_keeps_the_newest_files(df, cache_dir, monkeypatch):
+    monkeypatch.setattr(download, "MAX_CACHED", 2)
+    for region in range(3):
+        download.to_bytes(df, "v1", region_ids=[region])
+    assert len(list(cache_dir.iterdir())) == 2
@@ -0,0 +1,49 @@
+from dataclasses import replace
+
+import pytest
+
+from zensus22 import charts, export, facts
+from zensus22.export import _fingerprint, _outdated
+
+
+@pytest.fixture
+def df(census_frame):
+    return census_frame(["Bund", "Land", "Land"])
+
+
+def test_fingerprint_follows_the_row(df):
+    before = [_fingerprint(df, i) for i in range(3)]
+    df.loc[2, "QMMIETE"] = 8.5
+    assert [_fingerprint(df, i) for i in range(3)][:2] == before[:2]
+    assert _fingerprint(df, 2) != before[2]
+
+
+@pytest.mark.parametrize("module, name, value", [
+    (export, "EXPORT_VERSION", -1),
+    (export, "LAYOUT_VERSION", -1),
+    (facts, "FACTS_VERSION", -1),
+    (charts, "CHART_MODE", "other"),
+])
+def test_fingerprint_follows_the_renderer(df, monkeypatch, module, name, value):
+    before = _fingerprint(df, 1)
+    monkeypatch.setattr(module, name, value)
+    assert _fingerprint(df, 1) != before
+
+
+def test_fingerprint_follows_the_chart_registry(df, monkeypatch):
+    before = _fingerprint(df, 1)
+    spec = charts.CHARTS[0]
+    renamed = replace(spec, categories=spec.categories[:-1] + ((spec.columns[-1], "Renamed"),))
+    monkeypatch.setattr(facts, "CHARTS", [renamed] + charts.CHARTS[1:])
+    assert _fingerprint(df, 1) != before
+
+
+def test_outdated_regions(tmp_path):
+    for region in ("0", "1", "2"):
+        (tmp_path / region).mkdir()
+        (tmp_path / region / "index.html").write_text("")
+    (tmp_path / "2" / "index.html").unlink()
+    fingerprints = {"0": "a", "1": "b", "2": "c", "3": "d"}
+    # 0 unchanged, 1 changed, 2 deleted from the site, 3 new
+    assert _outdated(fingerprints, {"0": "a", "1": "x", "2": "c"}, tmp_path) == [1, 2, 3]
+    assert _outdated(fingerprints, {}, tmp_path) == [0, 1, 2, 3]
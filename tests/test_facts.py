@@ -0,0 +1,71 @@
+from dataclasses import replace
+
+import numpy as np
+
+from zensus22 import facts as facts_module
+from zensus22.charts import CHARTS, CHARTS_BY_ID
+from zensus22.columnar import derived_path, source_hash
+from zensus22.facts import FactTable, _layout_hash, fact_table, shares
+from zensus22.loader import dataset_version, invalidate, load_wohnungen
+
+
+def test_shares_per_block():
+    values = np.array([[1.0, 3.0, 2.0, 2.0]])
+    np.testing.assert_allclose(shares(values, [slice(0, 2), slice(2, 4)]), [[25.0, 75.0, 50.0, 50.0]])
+
+
+def test_missing_counts_do_not_add_to_the_total():
+    values = np.array([[1.0, np.nan, 3.0]])
+    np.testing.assert_allclose(shares(values, [slice(0, 3)]), [[25.0, np.nan, 75.0]])
+
+
+def test_zero_or_missing_total_gives_missing_shares():
+    values = np.array([[0.0, 0.0], [np.nan, np.nan]])
+    assert np.isnan(shares(values, [slice(0, 2)])).all()
+
+
+def test_fact_table_slices(census_frame):
+    df = census_frame(["Bund", "Land"], NUTZUNG__02=[1.0, 5.0])
+    facts = FactTable(df)
+    spec = CHARTS_BY_ID["nutzung"]
+
+    frame = facts.frame(1, "nutzung")
+    assert frame["Category"].tolist() == spec.labels
+    assert (frame["region_id"] == 1).all()
+    assert frame["Quantity"].tolist()[1] == 5.0
+    assert np.isclose(frame["Percent"].sum(), 100)
+
+    rows = facts.rows([1, 0], "nutzung")
+    assert rows["region_id"].tolist() == [1] * len(spec.labels) + [0] * len(spec.labels)
+    np.testing.assert_allclose(facts.share([0, 1], "nutzung", 1), rows["Percent"].to_numpy()[[len(spec.labels) + 1, 1]])
+
+
+def test_nested_breakdowns_have_no_percent(census_frame):
+    facts = FactTable(census_frame(["Bund"]))
+    assert facts.frame(0, "gebaeudeart")["Percent"].isna().all()
+    assert facts.frame(0, "nutzung")["Percent"].notna().all()
+
+
+def test_fact_table_is_shared_through_one_file(workbook):
+    facts = fact_table(load_wohnungen(workbook))
+    path = derived_path(workbook, "facts")
+    assert source_hash(path) == f"{dataset_version(workbook)}:{_layout_hash()}"
+    written = path.stat().st_mtime_ns
+
+    # Another process (or a restarted one) attaches to the same file
+    invalidate(workbook)
+    attached = fact_table(load_wohnungen(workbook))
+    assert path.stat().st_mtime_ns == written
+    assert attached.table.equals(facts.table)
+
+
+def test_changed_registry_rebuilds_the_shared_file(workbook, monkeypatch):
+    fact_table(load_wohnungen(workbook))
+    invalidate(workbook)
+
+    spec = CHARTS[-1]
+    renamed = replace(spec, categories=spec.categories[:-1] + ((spec.columns[-1], "Renamed"),))
+    monkeypatch.setattr(facts_module, "CHARTS", CHARTS[:-1] + [renamed])
+    facts = fact_table(load_wohnungen(workbook))
+    assert source_hash(derived_path(workbook, "facts")) == f"{dataset_version(workbook)}:{_layout_hash()}"
+    assert facts.frame(0, spec.id)["Category"].iloc[-1] == "Renamed"
@@ -0,0 +1,35 @@
+import math
+
+import pytest
+
+from zensus22.hierarchy import BUND, KREIS, LAND, Hierarchy, normalize_key
+
+
+@pytest.mark.parametrize("key, n, expected", [
+    ("01", 2, "01"),
+    (1, 2, "01"),             # leading zero lost by Excel
+    (1001.0, 5, "01001"),     # read as a float
+    ("01001", 2, "01"),
+    ("010010000000", 5, "01001"),
+    (" 09162000 ", 5, "09162"),
+    ("01", 5, None),          # a Land key has no Kreis prefix
+    ("DG", 2, None),          # the Bund key is not numeric
+    (None, 2, None),
+    (math.nan, 2, None),
+])
+def test_normalize_key(key, n, expected):
+    assert normalize_key(key, n) == expected
+
+
+def test_links_and_aggregates(census_frame):
+    # Kreis 3 has no Land with its key and stays unlinked
+    df = census_frame([BUND, LAND, LAND, KREIS, KREIS, KREIS],
+                      QMMIETE=[7.0, 7.0, 7.0, 6.0, 8.0, 9.0])
+    df["ARS"] = ["DG", "01", "02", "01002", "01001", "03001"]
+    tree = Hierarchy(df)
+    assert [tree.parent_of(i) for i in range(6)] == [None, 0, 0, 1, 1, None]
+    assert list(tree.children_of(0)) == [1, 2]
+    assert list(tree.children_of(1)) == [3, 4]
+    assert len(tree.children_of(5)) == 0
+    assert tree.summary(1).loc["QMMIETE", "mean"] == 7.0
+    assert tree.summary(5) is None
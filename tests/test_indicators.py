@@ -0,0 +1,98 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from zensus22 import indicators
+from zensus22.charts import CHARTS_BY_ID
+from zensus22.indicators import Indicator, evaluate, register
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    # Indicators registered by a test are removed again
+    saved, saved_by_id = list(indicators.INDICATORS), dict(indicators.INDICATORS_BY_ID)
+    yield
+    indicators.INDICATORS[:] = saved
+    indicators.INDICATORS_BY_ID.clear()
+    indicators.INDICATORS_BY_ID.update(saved_by_id)
+
+
+def values(df, expression, indicator_id="test"):
+    register(Indicator(indicator_id, "Test", expression))
+    return evaluate(df, indicator_id)
+
+
+def test_arithmetic():
+    df = pd.DataFrame({"A": [1.0, 2.0], "B": [4.0, 8.0]})
+    np.testing.assert_allclose(values(df, "-A + 2 * B - B / 4"), [6.0, 12.0])
+
+
+def test_sum_counts_missing_as_zero_unless_all_missing():
+    df = pd.DataFrame({"A": [1.0, np.nan, np.nan], "B": [2.0, 3.0, np.nan]})
+    np.testing.assert_array_equal(values(df, "sum(A, B)"), [3.0, 3.0, np.nan])
+
+
+def test_division_by_zero_is_missing():
+    df = pd.DataFrame({"A": [1.0, 0.0], "B": [0.0, 0.0]})
+    assert np.isnan(values(df, "A / B")).all()
+
+
+def test_total_sums_the_chart_columns():
+    columns = CHARTS_BY_ID["nutzung"].columns
+    df = pd.DataFrame({col: [float(i + 1), np.nan] for i, col in enumerate(columns)})
+    result = values(df, "total(nutzung)")
+    assert result[0] == sum(range(1, len(columns) + 1))
+    assert np.isnan(result[1])
+
+
+@pytest.mark.parametrize("expression", ["A ** 2", "A % 2", "abs(A)", "A.real", "sum(A, start=1)",
+                                        "total(unknown)", "total(A, B)", "'text'", "A < B"])
+def test_unsupported_expressions(expression):
+    with pytest.raises(ValueError, match="Unsupported expression"):
+        Indicator("bad", "Bad", expression)
+
+
+def test_indicators_can_use_other_indicators():
+    df = pd.DataFrame({"A": [1.0, 2.0]})
+    register(Indicator("double", "Double", "2 * A"))
+    np.testing.assert_array_equal(values(df, "double + 1"), [3.0, 5.0])
+
+
+def test_cycles_are_rejected():
+    df = pd.DataFrame({"A": [1.0]})
+    register(Indicator("first", "First", "second + A"))
+    register(Indicator("second", "Second", "first"))
+    with pytest.raises(ValueError, match="depends on itself"):
+        evaluate(df, "first")
+
+
+def test_results_are_memoized_by_input_content():
+    df = pd.DataFrame({"A": [1.0, 2.0], "B": [3.0, 4.0]})
+    register(Indicator("memo", "Memo", "A + B"))
+    first = evaluate(df, "memo")
+    assert not first.flags.writeable
+
+    misses = indicators.stats["misses"]
+    # An equal frame hits the memo, a changed input column does not
+    assert evaluate(df.copy(), "memo") is first
+    assert indicators.stats["misses"] == misses
+    changed = df.assign(B=[3.0, 5.0])
+    np.testing.assert_array_equal(evaluate(changed, "memo"), [4.0, 7.0])
+    assert indicators.stats["misses"] == misses + 1
+
+
+def test_changed_expression_is_computed_again():
+    df = pd.DataFrame({"A": [1.0]})
+    assert values(df, "A + 1", "changing")[0] == 2.0
+    assert values(df, "A + 2", "changing")[0] == 3.0
+
+
+def test_shipped_indicators(census_frame):
+    df = census_frame(["Bund", "Land"])
+    result = indicators.evaluate_all(df)
+    assert set(result) == {i.id for i in indicators.INDICATORS}
+    # Every energy source counts 1: three of the sources are fossil
+    energy = len(CHARTS_BY_ID["energietraeger"].columns)
+    assert math.isclose(result["fossil_share"][0], 300 / energy)
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from zensus22 import loader
+from zensus22.loader import dataset_version, frame_source, invalidate, load_wohnungen
+from zensus22.synthetic import write_workbook
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    # Number of content hashes and workbook parses
+    counts = {"hash": 0, "parse": 0}
+    content_hash, read_workbook = loader._content_hash, loader.read_workbook
+
+    def counted_hash(path):
+        counts["hash"] += 1
+        return content_hash(path)
+
+    def counted_read(path):
+        counts["parse"] += 1
+        return read_workbook(path)
+
+    monkeypatch.setattr(loader, "_content_hash", counted_hash)
+    monkeypatch.setattr(loader, "read_workbook", counted_read)
+    return counts
+
+
+def test_unchanged_file_costs_a_stat(workbook, calls):
+    df = load_wohnungen(workbook)
+    assert calls == {"hash": 1, "parse": 1}
+    assert load_wohnungen(workbook) is df
+    assert calls == {"hash": 1, "parse": 1}
+    assert frame_source(df) == (str(workbook.resolve()), dataset_version(workbook))
+
+
+def test_touched_file_is_hashed_not_parsed(workbook, calls):
+    df = load_wohnungen(workbook)
+    stat = os.stat(workbook)
+    os.utime(workbook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert load_wohnungen(workbook) is df
+    assert calls == {"hash": 2, "parse": 1}
+
+
+def test_changed_file_is_loaded_again(workbook, calls):
+    df = load_wohnungen(workbook)
+    version = dataset_version(workbook)
+    write_workbook(workbook, scale=0.04, seed=1)
+    changed = load_wohnungen(workbook)
+    assert changed is not df
+    assert dataset_version(workbook) != version
+    assert calls["parse"] == 2
+    assert frame_source(df) is None
+
+
+def test_invalidate(workbook, calls):
+    df = load_wohnungen(workbook)
+    invalidate(workbook)
+    assert frame_source(df) is None
+    again = load_wohnungen(workbook)
+    assert again is not df
+    assert calls["hash"] == 2
+
+
+def test_derived_is_built_once_per_frame(workbook):
+    df = load_wohnungen(workbook)
+    built = []
+    assert loader.derived(df, "test", lambda df: built.append(1) or len(built)) == 1
+    assert loader.derived(df, "test", lambda df: built.append(1) or len(built)) == 1
+    # Frames not loaded through the cache are not memoized
+    copy = df.copy()
+    assert loader.derived(copy, "test", lambda df: "fresh") == "fresh"
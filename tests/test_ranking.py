@@ -0,0 +1,53 @@
+import math
+
+import numpy as np
+import pytest
+
+from zensus22.facts import FactTable
+from zensus22.ranking import INDICATORS, Rankings, share_key
+
+LAND = "Land"
+
+
+@pytest.fixture
+def ranks(census_frame):
+    # Four Länder with a tie and a missing value, and a Bund row ranked on its own
+    df = census_frame(["Bund", LAND, LAND, LAND, LAND], QMMIETE=[9.0, 5.0, 7.0, 7.0, np.nan])
+    return Rankings(df, FactTable(df))
+
+
+def test_ties_share_the_best_rank(ranks):
+    assert ranks.rank(2, "QMMIETE")[:2] == (1, 3)
+    assert ranks.rank(3, "QMMIETE")[:2] == (1, 3)
+    assert ranks.rank(1, "QMMIETE")[:2] == (3, 3)
+
+
+def test_missing_values_are_not_ranked(ranks):
+    rank, count, percentile = ranks.rank(4, "QMMIETE")
+    assert (rank, count) == (0, 3)
+    assert math.isnan(percentile)
+
+
+def test_percentiles(ranks):
+    # (count - rank) / (count - 1): highest value 100, lowest 0
+    assert ranks.rank(2, "QMMIETE")[2] == 100.0
+    assert ranks.rank(1, "QMMIETE")[2] == 0.0
+    # A region alone on its level
+    assert ranks.rank(0, "QMMIETE") == (1, 1, 100.0)
+
+
+def test_top_and_bottom_skip_missing_values(ranks):
+    assert ranks.top(LAND, "QMMIETE").tolist() == [2, 3, 1]
+    assert ranks.bottom(LAND, "QMMIETE", n=2).tolist() == [1, 3]
+
+
+def test_shares_are_ranked_within_their_chart(census_frame):
+    df = census_frame([LAND, LAND], NUTZUNG__01=[1.0, 3.0])
+    ranks = Rankings(df, FactTable(df))
+    key = share_key("nutzung", 0)
+    assert ranks.value(1, key) > ranks.value(0, key)
+    assert ranks.rank(1, key)[0] == 1
+
+
+def test_nested_breakdowns_have_no_share_indicators():
+    assert not any(key.startswith("gebaeudeart:") for key in INDICATORS)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from zensus22.similar import SimilarityIndex
+
+LAND = "Land"
+LOW_RENT = "MIETE_EURM2_2__01"
+
+
+@pytest.fixture
+def frame(census_frame):
+    # Länder differing only in the share of the lowest rent class; the last one has no counts at all
+    df = census_frame(["Bund", LAND, LAND, LAND, LAND, LAND])
+    df[LOW_RENT] = [1.0, 1.0, 2.0, 9.0, 4.0, 1.0]
+    df.loc[5, df.columns[2:]] = np.nan
+    return df
+
+
+def test_nearest_first(frame):
+    index = SimilarityIndex(frame)
+    ids, distances = index.similar(1)
+    assert list(ids) == [2, 4, 3]
+    assert np.all(np.diff(distances) > 0)
+
+
+def test_distances_are_euclidean(frame):
+    index = SimilarityIndex(frame)
+    ids, distances = index.nearest(index.profile[1], k=2, level=LAND)
+    assert list(ids) == [1, 2]
+    np.testing.assert_allclose(distances, [0.0, np.linalg.norm(index.profile[1] - index.profile[2])], atol=1e-7)
+
+
+def test_k_level_and_exclude(frame):
+    index = SimilarityIndex(frame)
+    assert list(index.similar(1, k=1)[0]) == [2]
+    assert list(index.similar(1, level="Bund")[0]) == [0]
+    assert len(index.nearest(index.profile[1], k=10, level="Gemeinde")[0]) == 0
+
+
+def test_regions_without_counts_are_skipped(frame):
+    index = SimilarityIndex(frame)
+    assert not index.valid[5]
+    assert 5 not in index.similar(1, k=10)[0]
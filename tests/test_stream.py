@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+from zensus22 import loader, stream
+from zensus22.charts import ALL_COLUMNS
+from zensus22.columnar import source_hash
+from zensus22.loader import _content_hash
+from zensus22.similar import gemeinde_index
+from zensus22.stream import COUNT_TYPE, GEMEINDE, gemeinde_cache_path, load_gemeinden, stream_to_cache
+from zensus22.synthetic import synthetic_frame, write_workbook
+
+# 1 Bund, 16 Länder, 16 Kreise and 2 Gemeinden per Kreis
+ROWS = 1 + 16 + 16 + 32
+
+
+@pytest.fixture
+def gemeinde_workbook(tmp_path):
+    path = write_workbook(tmp_path / "Data_wohnungen.xlsx", scale=0.04, gemeinden_per_kreis=2)
+    yield path
+    loader.invalidate(path)
+
+
+def test_stream_in_chunks(gemeinde_workbook):
+    out, rows = stream_to_cache(gemeinde_workbook, chunk_size=7)
+    assert out == gemeinde_cache_path(gemeinde_workbook)
+    assert rows == ROWS
+    assert source_hash(out) == _content_hash(gemeinde_workbook)
+
+    df = load_gemeinden(out)
+    raw = synthetic_frame(0.04, gemeinden_per_kreis=2)
+    assert len(df) == ROWS
+    assert df["Region"].iloc[0] == "Germany"
+    assert (df["Regionalebene"] == GEMEINDE).sum() == 32
+    assert df[ALL_COLUMNS[0]].dtype == pd.ArrowDtype(COUNT_TYPE)
+    # Suppressed cells ("-", "/") are missing, the others keep their count
+    published = raw[ALL_COLUMNS[0]].map(lambda v: v not in ("-", "/")).to_numpy()
+    assert df[ALL_COLUMNS[0]].notna().to_numpy().tolist() == published.tolist()
+    assert df["QMMIETE"].tolist() == raw["QMMIETE"].tolist()
+
+
+def test_levels_and_columns(gemeinde_workbook):
+    out, rows = stream_to_cache(gemeinde_workbook, gemeinde_workbook.parent / "only.feather",
+                                levels=[GEMEINDE], columns=["ARS", "QMMIETE"])
+    assert rows == 32
+    assert list(load_gemeinden(out).columns) == ["Region", "Regionalebene", "ARS", "QMMIETE"]
+    with pytest.raises(KeyError):
+        stream_to_cache(gemeinde_workbook, columns=["UNKNOWN"])
+
+
+def test_interrupted_stream_leaves_no_file(gemeinde_workbook, monkeypatch):
+    batches = stream.iter_batches
+
+    def failing(*args, **kwargs):
+        for batch in batches(*args, **kwargs):
+            yield batch
+            raise OSError("disk full")
+
+    monkeypatch.setattr(stream, "iter_batches", failing)
+    with pytest.raises(OSError):
+        stream_to_cache(gemeinde_workbook, chunk_size=7)
+    assert list(gemeinde_cache_path(gemeinde_workbook).parent.iterdir()) == []
+
+
+def test_gemeinde_index_follows_the_workbook(gemeinde_workbook):
+    assert gemeinde_index(gemeinde_workbook) is None
+    stream_to_cache(gemeinde_workbook)
+    df, index = gemeinde_index(gemeinde_workbook)
+    assert len(df) == ROWS and index.valid.any()
+
+    write_workbook(gemeinde_workbook, scale=0.04, gemeinden_per_kreis=3)
+    df, _ = gemeinde_index(gemeinde_workbook)
+    assert len(df) == ROWS + 16
+    assert source_hash(gemeinde_cache_path(gemeinde_workbook)) == _content_hash(gemeinde_workbook)
+
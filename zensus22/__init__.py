@@ -0,0 +1,6 @@
+# Data layer for the Zensus 2022 housing statistics app
+
+from zensus22.index import RegionIndex, region_index
+from zensus22.loader import DATA_PATH, REGION_LEVEL_TRANSLATIONS, REGION_LEVELS, invalidate, load_wohnungen
+
+__all__ = ["DATA_PATH", "REGION_LEVEL_TRANSLATIONS", "REGION_LEVELS", "RegionIndex", "invalidate", "load_wohnungen", "region_index"]
@@ -0,0 +1,130 @@
+# Command line entry point: python -m zensus22 <command>
+
+import argparse
+
+from zensus22.loader import DATA_PATH
+
+
+def _compile(args):
+    from zensus22.columnar import available, compile_workbook
+
+    if not available():
+        raise SystemExit("pyarrow is required to compile the columnar cache")
+    path, built = compile_workbook(args.source, force=args.force)
+    print(f"{'Compiled' if built else 'Up to date'}: {path}")
+
+    if args.gemeinden:
+        from zensus22.stream import stream_to_cache
+
+        path, rows = stream_to_cache(args.source, chunk_size=args.chunk_size)
+        print(f"Streamed {rows} rows including Gemeinden: {path}")
+
+
+def _serve(args):
+    import uvicorn
+
+    uvicorn.run("zensus22.api:app", host=args.host, port=args.port, workers=args.workers)
+
+
+def _export(args):
+    from zensus22.export import export_site
+
+    written, skipped = export_site(args.out, source=args.source, jobs=args.jobs, force=args.force)
+    print(f"Exported {written} regions to {args.out} ({skipped} unchanged)")
+
+
+def _ingest(args):
+    from zensus22.ingest import STORE_DIR, ingest
+
+    processed = ingest(args.tables or None, force=args.force)
+    print(f"Ingested {', '.join(processed) if processed else 'nothing (store is up to date)'} -> {STORE_DIR}")
+
+
+def _memory(args):
+    from zensus22.loader import load_wohnungen, memory_report, suppressed_cells
+
+    df = load_wohnungen(args.source)
+    report = memory_report(df)
+    saved = 1 - report["compact_bytes"] / report["baseline_bytes"]
+    print(f"Rows: {len(df)}, columns: {df.shape[1]}")
+    print(f"Memory: {report['compact_bytes'] / 1024:.0f} KiB (float64/object: {report['baseline_bytes'] / 1024:.0f} KiB, {saved:.0%} less)")
+    print("Dtypes: " + ", ".join(f"{k} x{v}" for k, v in report["dtypes"].items()))
+    print(f"Suppressed cells: {sum(len(rows) for rows in suppressed_cells(df).values())}")
+
+
+def _bench(args):
+    import json
+
+    from zensus22 import bench
+
+    document = bench.run(args.scales, repeat=args.repeat, excel=not args.skip_excel)
+    for (scale, stage), ms in bench.summarize(document).items():
+        print(f"scale {scale if scale is not None else '-':>4}  {stage:<14} {ms:10.3f} ms")
+    if args.out:
+        bench.write(document, args.out)
+
+    thresholds = dict(bench.THRESHOLDS_MS)
+    if args.thresholds:
+        with open(args.thresholds, encoding="utf-8") as f:
+            thresholds.update(json.load(f))
+    failures = [f"{stage}: {ms:.3f} ms > {limit} ms" for stage, ms, limit in bench.check(document, thresholds)]
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        failures += [f"{stage} (scale {scale}): {ms:.3f} ms vs. {before:.3f} ms"
+                     for scale, stage, ms, before in bench.compare(document, baseline, args.tolerance)]
+    if failures:
+        raise SystemExit("Regressions:\n  " + "\n  ".join(failures))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m zensus22")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compile_cmd = commands.add_parser("compile", help="compile the workbook into the columnar cache")
+    compile_cmd.add_argument("--source", default=str(DATA_PATH), help="path to Data_wohnungen.xlsx")
+    compile_cmd.add_argument("--force", action="store_true", help="rebuild even if the cache is current")
+    compile_cmd.add_argument("--gemeinden", action="store_true",
+                             help="also stream all rows including the Gemeinde level into a separate cache file")
+    compile_cmd.add_argument("--chunk-size", type=int, default=5000, help="rows per chunk when streaming")
+    compile_cmd.set_defaults(func=_compile)
+
+    serve_cmd = commands.add_parser("serve", help="run the HTTP API")
+    serve_cmd.add_argument("--host", default="127.0.0.1")
+    serve_cmd.add_argument("--port", type=int, default=8000)
+    serve_cmd.add_argument("--workers", type=int, default=4, help="number of worker processes")
+    serve_cmd.set_defaults(func=_serve)
+
+    export_cmd = commands.add_parser("export", help="write static HTML/JSON pages for every region")
+    export_cmd.add_argument("out", help="output directory")
+    export_cmd.add_argument("--source", default=str(DATA_PATH), help="path to Data_wohnungen.xlsx")
+    export_cmd.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    export_cmd.add_argument("--force", action="store_true", help="rewrite every region")
+    export_cmd.set_defaults(func=_export)
+
+    ingest_cmd = commands.add_parser("ingest", help="ingest the census tables into the combined store")
+    ingest_cmd.add_argument("tables", nargs="*", help="tables to ingest (default: all with a source file)")
+    ingest_cmd.add_argument("--force", action="store_true", help="reprocess tables even if unchanged")
+    ingest_cmd.set_defaults(func=_ingest)
+
+    memory_cmd = commands.add_parser("memory", help="report the memory held by the loaded frame")
+    memory_cmd.add_argument("--source", default=str(DATA_PATH), help="path to Data_wohnungen.xlsx")
+    memory_cmd.set_defaults(func=_memory)
+
+    bench_cmd = commands.add_parser("bench", help="time the load, filter, transform and render stages")
+    bench_cmd.add_argument("--scales", type=float, nargs="+", default=[1],
+                           help="synthetic data sizes relative to the real workbook")
+    bench_cmd.add_argument("--repeat", type=int, default=5, help="repetitions per measurement (median is kept)")
+    bench_cmd.add_argument("--skip-excel", action="store_true", help="do not report the workbook parse")
+    bench_cmd.add_argument("--out", help="write the results as JSON")
+    bench_cmd.add_argument("--thresholds", help="JSON file {stage: ms} overriding the default limits at scale 1")
+    bench_cmd.add_argument("--baseline", help="earlier --out file to compare against")
+    bench_cmd.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown against the baseline")
+    bench_cmd.set_defaults(func=_bench)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# Headless HTTP API serving the per-region statistics shown in the app
+
+import json
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from zensus22 import download, timing
+from zensus22.charts import CHARTS_BY_ID, METRICS
+from zensus22.facts import fact_table
+from zensus22.hierarchy import KEY_PREFIX, hierarchy, key_column, normalize_key
+from zensus22.loader import REGION_LEVELS, derived, frame_source, json_value, load_wohnungen
+
+# The data changes once per census publication
+CACHE_CONTROL = "public, max-age=3600"
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Load the data when the worker starts, not on its first request
+    derived(load_wohnungen(), "api_payloads", Payloads)
+    yield
+
+
+app = FastAPI(title="Zensus 2022 housing statistics", lifespan=lifespan)
+
+
+class Payloads:
+    """Serialized responses for one loaded frame, built on first request."""
+
+    def __init__(self, df):
+        self.df = df
+        self.version = frame_source(df)[1]
+        self.facts = fact_table(df)
+        self.tree = hierarchy(df)
+        self.bodies = {}
+
+    def regions(self, level):
+        df = self.df
+        levels = df["Regionalebene"].astype(str).tolist()
+        names = df["Region"].astype(str).tolist()
+        col = key_column(df)
+        keys = df[col].tolist() if col else [None] * len(df)
+        result = []
+        for i, (lvl, name, key) in enumerate(zip(levels, names, keys)):
+            if level is not None and lvl != level:
+                continue
+            result.append({
+                "id": i, "name": name, "level": lvl,
+                "key": normalize_key(key, KEY_PREFIX[lvl]) if lvl in KEY_PREFIX else None,
+                "parent": self.tree.parent_of(i),
+            })
+        return result
+
+    def metrics(self, region_id):
+        row = self.df.iloc[region_id]
+        return {"id": region_id, "name": str(row["Region"]), "level": str(row["Regionalebene"]),
+                **{col: json_value(float(row[col])) for col in METRICS}}
+
+    def dimension(self, region_id, dimension):
+        frame = self.facts.frame(region_id, dimension)
+        return {"id": region_id, "dimension": dimension,
+                "categories": [{"category": c, "quantity": json_value(q), "percent": json_value(p)}
+                               for c, q, p in zip(frame["Category"].tolist(),
+                                                  frame["Quantity"].tolist(),
+                                                  frame["Percent"].tolist())]}
+
+    def body(self, key, build):
+        if key not in self.bodies:
+            self.bodies[key] = json.dumps(build(), ensure_ascii=False, separators=(",", ":")).encode()
+        return self.bodies[key]
+
+
+# Handlers are plain functions, so FastAPI runs them in its threadpool: a request
+# that has to reload a changed workbook does not block the event loop
+
+
+def _payloads():
+    # The loaded frame is looked up once per request
+    return derived(load_wohnungen(), "api_payloads", Payloads)
+
+
+def _not_modified(if_none_match, etag):
+    # If-None-Match holds "*" or a comma-separated list of (possibly weak, W/"...") tags
+    tags = {tag.strip().removeprefix("W/") for tag in (if_none_match or "").split(",")}
+    return "*" in tags or etag in tags
+
+
+def _respond(request, payloads, key, build):
+    etag = f'"{payloads.version[:16]}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    if _not_modified(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    run = timing.begin(memory=False)
+    with timing.stage("payload", key[0] if key[0] in CHARTS_BY_ID else None) as measured:
+        body = payloads.body(key, lambda: build(payloads))
+    if measured is not None:
+        measured.payload_bytes = len(body)
+    timing.end(run)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _check_region(payloads, region_id):
+    if not 0 <= region_id < len(payloads.df):
+        raise HTTPException(status_code=404, detail="Unknown region")
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    # Stage timings of this worker (recorded with ZENSUS_TIMING=1)
+    return Response(timing.prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/download")
+def bulk_download(format: str = "csv", level: list[str] = Query(None), region: list[int] = Query(None),
+                  dimension: list[str] = Query(None)):
+    # Streamed in row batches from the loaded frame (encoded in the threadpool as the
+    # response is sent); repeated queries are served from data/.cache/downloads
+    payloads = _payloads()
+    try:
+        chunks = download.stream(payloads.df, payloads.version, format, levels=level, region_ids=region,
+                                 dimensions=dimension)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
+
+    headers = {"Cache-Control": CACHE_CONTROL,
+               "Content-Disposition": f'attachment; filename="zensus22_wohnungen.{format}"'}
+    return StreamingResponse(chunks, media_type=download.FORMATS[format], headers=headers)
+
+
+@app.get("/regions")
+def regions(request: Request, level: str = None):
+    if level is not None and level not in REGION_LEVELS:
+        raise HTTPException(status_code=400, detail=f"level must be one of {REGION_LEVELS}")
+    return _respond(request, _payloads(), ("regions", level), lambda p: p.regions(level))
+
+
+@app.get("/regions/{region_id}/metrics")
+def metrics(request: Request, region_id: int):
+    payloads = _payloads()
+    _check_region(payloads, region_id)
+    return _respond(request, payloads, ("metrics", region_id), lambda p: p.metrics(region_id))
+
+
+@app.get("/regions/{region_id}/{dimension}")
+def dimension(request: Request, region_id: int, dimension: str):
+    payloads = _payloads()
+    _check_region(payloads, region_id)
+    if dimension not in CHARTS_BY_ID:
+        raise HTTPException(status_code=404, detail=f"dimension must be one of {list(CHARTS_BY_ID)}")
+    return _respond(request, payloads, (dimension, region_id), lambda p: p.dimension(region_id, dimension))
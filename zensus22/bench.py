@@ -0,0 +1,150 @@
+# Benchmarks for the load, filter, transform and render stages, run without a browser
+
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from zensus22 import columnar
+from zensus22.charts import CHARTS, build_figure
+from zensus22.facts import FactTable
+from zensus22.index import RegionIndex
+from zensus22.loader import REGION_LEVELS, _content_hash, read_workbook
+from zensus22.synthetic import write_workbook
+
+# Upper limits in milliseconds at scale 1 (about the size of the real workbook).
+# Per-region stages are the median over the representative regions.
+THRESHOLDS_MS = {
+    "import": 3000,
+    "load_excel": 5000,
+    "load_columnar": 200,
+    "build_indexes": 300,
+    "filter_mask": 20,
+    "filter_index": 5,
+    "transform": 5,
+    "figure": 250,
+}
+
+
+def _median_time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+# Modules the main page imports before its first run
+APP_IMPORTS = "import streamlit, zensus22, zensus22.charts, zensus22.figures, zensus22.timing"
+
+
+def import_time(repeat=3):
+    """Cold import of the app's modules in a fresh interpreter, minus the bare interpreter start."""
+    root = Path(__file__).resolve().parent.parent
+
+    def spawn(code):
+        return lambda: subprocess.run([sys.executable, "-c", code], check=True, cwd=root)
+
+    return max(0.0, _median_time(spawn(APP_IMPORTS), repeat) - _median_time(spawn("pass"), repeat))
+
+
+def representative_regions(index):
+    """First and middle region of every level."""
+    regions = []
+    for level in REGION_LEVELS:
+        names = index.regions.get(level, [])
+        for name in dict.fromkeys([names[0], names[len(names) // 2]] if names else []):
+            regions.append((level, name))
+    return regions
+
+
+def bench_scale(scale, repeat=5, excel=True, workdir=None):
+    """Time every stage on a synthetic workbook ``scale`` times the size of the real one."""
+    results = []
+
+    def record(stage, seconds, **extra):
+        results.append({"scale": scale, "stage": stage, "ms": round(seconds * 1000, 4), **extra})
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        path = write_workbook(Path(tmp) / "Data_wohnungen.xlsx", scale=scale)
+        digest = _content_hash(path)
+
+        # Load: openpyxl parse, then the compiled columnar file
+        start = time.perf_counter()
+        df, suppressed = read_workbook(path)
+        if excel:
+            record("load_excel", time.perf_counter() - start, rows=len(df))
+        columnar.write_cache(df, suppressed, path, digest)
+        record("load_columnar", _median_time(lambda: columnar.read_cache(path, digest), repeat))
+
+        record("build_indexes", _median_time(lambda: (RegionIndex(df), FactTable(df)), repeat))
+        index, facts = RegionIndex(df), FactTable(df)
+
+        region_col = df["Region"]
+        for level, name in representative_regions(index):
+            # The original per-rerun boolean mask against the index lookup
+            record("filter_mask", _median_time(lambda: df[region_col == name], repeat), level=level, region=name)
+            record("filter_index", _median_time(
+                lambda: df.iloc[index.position(level, name):index.position(level, name) + 1], repeat),
+                level=level, region=name)
+
+            region_id = index.position(level, name)
+            for spec in CHARTS:
+                record("transform", _median_time(lambda: facts.frame(region_id, spec.id), repeat),
+                       level=level, region=name, chart=spec.id)
+                frame = facts.frame(region_id, spec.id)
+                record("figure", _median_time(lambda: build_figure(spec, frame), max(1, repeat // 2)),
+                       level=level, region=name, chart=spec.id,
+                       bytes=len(build_figure(spec, frame).to_json()))
+
+    return results
+
+
+def run(scales=(1,), repeat=5, excel=True):
+    """Run every scale and return the results document."""
+    import pandas as pd
+    import plotly
+
+    # Import time does not depend on the data size (scale None)
+    results = [{"scale": None, "stage": "import", "ms": round(import_time() * 1000, 4)}]
+    for scale in scales:
+        results.extend(bench_scale(scale, repeat=repeat, excel=excel))
+    return {
+        "meta": {"python": platform.python_version(), "pandas": pd.__version__,
+                 "plotly": plotly.__version__, "machine": platform.machine(),
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+
+
+def summarize(document):
+    """Median ms per (scale, stage)."""
+    groups = {}
+    for r in document["results"]:
+        groups.setdefault((r["scale"], r["stage"]), []).append(r["ms"])
+    return {key: statistics.median(values)
+            for key, values in sorted(groups.items(), key=lambda item: (item[0][0] or 0, item[0][1]))}
+
+
+def check(document, thresholds=THRESHOLDS_MS):
+    """Stages at scale 1 (or independent of scale) slower than their threshold, as [(stage, ms, limit)]."""
+    return [(stage, ms, thresholds[stage])
+            for (scale, stage), ms in summarize(document).items()
+            if scale in (None, 1) and stage in thresholds and ms > thresholds[stage]]
+
+
+def compare(document, baseline, tolerance=1.5):
+    """Stages more than ``tolerance`` times slower than in ``baseline``, as [(scale, stage, ms, baseline ms)]."""
+    before = summarize(baseline)
+    return [(scale, stage, ms, before[scale, stage])
+            for (scale, stage), ms in summarize(document).items()
+            if (scale, stage) in before and ms > before[scale, stage] * tolerance]
+
+
+def write(document, path):
+    Path(path).write_text(json.dumps(document, indent=1), encoding="utf-8")
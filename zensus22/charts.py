@@ -0,0 +1,278 @@
+# Chart registry: one spec per categorical breakdown shown in the app
+
+import os
+from dataclasses import dataclass, field
+
+# Colors shared by every chart, assigned to categories in order
+PALETTE = ["#a6cee3", "#1f78b4", "#b2df8a", "#33a02c", "#fb9a99",
+           "#e31a1c", "#fdbf6f", "#ff7f00", "#cab2d6", "#6a3d9a"]
+
+TEMPLATE = "seaborn"
+
+# "lean" trims figures before they are sent (see lean_figure); "full" sends Plotly Express output as is
+CHART_MODE = os.environ.get("ZENSUS_CHART_MODE", "lean")
+
+# Headline metrics: column -> (label, number format)
+METRICS = {
+    "QMMIETE": ("∅ Net cold rent per square meter*", "%.2f €/m²"),
+    "LEQ": ("Vacancy rate*", "%.1f %%"),
+    "ETQ": ("Ownership rate*", "%.1f %%"),
+    "FLAECHE": ("∅ Area per apartment*", "%.1f m²"),
+}
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    """Describes one chart: source columns and labels, chart kind and layout."""
+
+    id: str
+    title: str
+    label: str                      # legend title / name of the category axis
+    categories: tuple               # ((census column, display label), ...)
+    kind: str                       # "bar", "pie" or "treemap"
+    section: str                    # page section (see SECTIONS)
+    percent: bool = False           # plot shares of the total instead of counts
+    nested: bool = False            # categories include their subtotals, so they are not shares of one whole
+    height: int = None
+    legend_y: float = -0.2
+    legend_horizontal: bool = False
+    column: int = 1                 # page column the chart is placed in
+    spacer: int = 0                 # blank lines written above the chart
+    stretch: bool = True            # fill the page column (width="stretch")
+    colors: dict = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Color map built once per process
+        object.__setattr__(self, "colors", dict(zip(self.labels, PALETTE)))
+
+    @property
+    def columns(self):
+        return [code for code, _ in self.categories]
+
+    @property
+    def labels(self):
+        return [label for _, label in self.categories]
+
+
+CHARTS = [
+    ChartSpec(
+        id="gebaeudeart",
+        title="Number of apartments by building type",
+        label="Building type",
+        categories=(
+            ("GEBAEUDEART_SYS_1", "Apartments in buildings with living space"),
+            ("GEBAEUDEART_SYS_11", "Apartments in residential buildings"),
+            ("GEBAEUDEART_SYS_111", "Apartments in residential buildings (excluding halls of residence)"),
+            ("GEBAEUDEART_SYS_112", "Apartments in halls of residence"),
+            ("GEBAEUDEART_SYS_12", "Apartments in other buildings with living space")),
+        kind="bar", section="Buildings & ownership", height=500, legend_y=-0.3, column=1, nested=True),
+    ChartSpec(
+        id="eigentum",
+        title="Proportion of apartments (in buildings with living space)<br>by type of ownership",
+        label="Form of ownership",
+        categories=(
+            ("EIGENTUM__1", "Community of apartment owners"),
+            ("EIGENTUM__2", "Private individuals"),
+            ("EIGENTUM__3", "Housing company"),
+            ("EIGENTUM__4", "Municipality or municipal housing company"),
+            ("EIGENTUM__5", "Private company"),
+            ("EIGENTUM__6", "Other private-sector company"),
+            ("EIGENTUM__7", "Federal or state"),
+            ("EIGENTUM__8", "Non-profit organization")),
+        kind="pie", section="Buildings & ownership", percent=True, height=600, legend_y=-0.8, column=2, stretch=False),
+    ChartSpec(
+        id="heiztyp",
+        title="Number of apartments (in buildings with living space)<br>by heating type",
+        label="Heating type",
+        categories=(
+            ("HEIZTYP__1", "District heating"),
+            ("HEIZTYP__2", "Single-storey heating system"),
+            ("HEIZTYP__3", "Block heating"),
+            ("HEIZTYP__4", "Central heating"),
+            ("HEIZTYP__5", "Single or multi-room stoves (also night storage heaters)"),
+            ("HEIZTYP__6", "No heating in the building or in the apartments")),
+        kind="bar", section="Heating & energy", height=600, legend_y=-0.2, column=1),
+    ChartSpec(
+        id="energietraeger",
+        title="Proportion of apartments (in buildings with living space)<br>by energy source",
+        label="Energy source",
+        categories=(
+            ("ENERGIETRAEGER__1", "Gas"),
+            ("ENERGIETRAEGER__2", "Heating oil"),
+            ("ENERGIETRAEGER__3", "Wood, wood pellets"),
+            ("ENERGIETRAEGER__4", "Biomass (excluding wood), biogas"),
+            ("ENERGIETRAEGER__5", "Solar/geothermal energy, heat pumps"),
+            ("ENERGIETRAEGER__6", "Electricity (without heat pumps)"),
+            ("ENERGIETRAEGER__7", "Energy source coal"),
+            ("NERGIETRAEGER__8", "District heating (various energy sources)"),
+            ("ENERGIETRAEGER__9", "No energy source (no heating)")),
+        kind="treemap", section="Heating & energy", percent=True, column=2, spacer=2),
+    ChartSpec(
+        id="nutzung",
+        title="Number of apartments (in buildings with living space)<br>by use",
+        label="Use",
+        categories=(
+            ("NUTZUNG__01", "Apartments occupied by the owner"),
+            ("NUTZUNG__02", "Rented apartments"),
+            ("NUTZUNG__03", "Privately used vacation or leisure apartments"),
+            ("NUTZUNG__04", "Vacant apartments")),
+        kind="bar", section="Use & rent", legend_y=-0.2, column=1),
+    ChartSpec(
+        id="miete",
+        title="Proportion of apartments (in buildings with living space)<br>by net cold rent",
+        label="Net cold rent",
+        categories=(
+            ("MIETE_EURM2_2__01", "under 4€/m²"),
+            ("MIETE_EURM2_2__02", "between 4€/m² and under 6€/m²"),
+            ("MIETE_EURM2_2__03", "between 6€/m² and under 8€/m²"),
+            ("MIETE_EURM2_2__04", "between 8€/m² and under 10€/m²"),
+            ("MIETE_EURM2_2__05", "between 10€/m² and under 12€/m²"),
+            ("MIETE_EURM2_2__06", "between 12€/m² and under 14€/m²"),
+            ("MIETE_EURM2_2__07", "between 14€/m² and under 16€/m²"),
+            ("MIETE_EURM2_2__08", "between 16€/m² and under 18€/m²"),
+            ("MIETE_EURM2_2__09", "between 18€/m² and under 20€/m²"),
+            ("MIETE_EURM2_2__10", "20€/m² and more")),
+        kind="treemap", section="Use & rent", percent=True, column=2),
+    ChartSpec(
+        id="wohnflaeche",
+        title="Number of apartments (in buildings with living space)<br>by living area",
+        label="Living area",
+        categories=(
+            ("WOHNFLAECHE_20S__01", "under 40m²"),
+            ("WOHNFLAECHE_20S__02", "40m² to 59m²"),
+            ("WOHNFLAECHE_20S__03", "60m² to 79m²"),
+            ("WOHNFLAECHE_20S__04", "80m² to 99m²"),
+            ("WOHNFLAECHE_20S__05", "100m² to 119m²"),
+            ("WOHNFLAECHE_20S__06", "120m² to 139m²"),
+            ("WOHNFLAECHE_20S__07", "140m² to 159m²"),
+            ("WOHNFLAECHE_20S__08", "160m² to 179m²"),
+            ("WOHNFLAECHE_20S__09", "180m² to 199m²"),
+            ("WOHNFLAECHE_20S__10", "200m² and more")),
+        kind="bar", section="Living area & rooms", height=600, legend_y=-0.3, legend_horizontal=True, column=1),
+    ChartSpec(
+        id="raumanzahl",
+        title="Proportion of apartments (in buildings with living space)<br>by number of rooms",
+        label="Number of rooms",
+        categories=(
+            ("RAUMANZAHL__01", "1 Room"),
+            ("RAUMANZAHL__02", "2 Rooms"),
+            ("RAUMANZAHL__03", "3 Rooms"),
+            ("RAUMANZAHL__04", "4 Rooms"),
+            ("RAUMANZAHL__05", "5 Rooms"),
+            ("RAUMANZAHL__06", "6 Rooms"),
+            ("RAUMANZAHL__07", "7 or more Rooms")),
+        kind="pie", section="Living area & rooms", percent=True, height=600, legend_y=-0.4, column=2, stretch=False),
+]
+
+CHARTS_BY_ID = {spec.id: spec for spec in CHARTS}
+
+# Page sections in display order; the first one is always rendered, the rest on demand
+SECTIONS = list(dict.fromkeys(spec.section for spec in CHARTS))
+
+# Every chart column in registry order
+ALL_COLUMNS = [code for spec in CHARTS for code in spec.columns]
+
+
+def build_figure(spec, frame, mode=None):
+    """Plotly figure for ``spec`` from its long-format frame, trimmed unless ``mode`` (default CHART_MODE) is "full"."""
+    import plotly.express as px
+
+    labels = {"Quantity": "Quantity", "Category": spec.label}
+
+    if spec.kind == "bar":
+        fig = px.bar(frame, x="Quantity", y="Region",
+                     color="Category", color_discrete_map=spec.colors,
+                     title=spec.title, labels=labels,
+                     barmode="group", template=TEMPLATE, orientation="h",
+                     height=spec.height)
+        legend = dict(x=0.5, y=spec.legend_y, xanchor="center", yanchor="top")
+        if spec.legend_horizontal:
+            legend["orientation"] = "h"
+        fig.update_layout(xaxis_title="Quantity", legend_title=spec.label, legend=legend)
+        fig.update_traces(hovertemplate=f"<b>{spec.label}:</b> %{{fullData.name}}<br><b>Quantity:</b> %{{x}}<extra></extra>")
+        fig.update_yaxes(tickangle=-90)
+
+    elif spec.kind == "pie":
+        fig = px.pie(frame, names="Category", values="Percent",
+                     color="Category", color_discrete_map=spec.colors,
+                     title=spec.title, labels=labels, template=TEMPLATE, hole=0.3,
+                     category_orders={"Category": spec.labels})
+        fig.update_traces(textinfo="percent", insidetextorientation="radial",
+                          hovertemplate="<b>%{label}</b><br>Percent: %{percent}<extra></extra>")
+        fig.update_layout(
+            legend=dict(title=dict(text=spec.label), orientation="h", yanchor="bottom",
+                        y=spec.legend_y, xanchor="center", x=0.5),
+            margin=dict(b=100), height=spec.height)
+
+    elif spec.kind == "treemap":
+        fig = px.treemap(frame, path=["Category"], values="Percent",
+                         color="Category", color_discrete_map=spec.colors,
+                         title=spec.title, labels={"Percent": "Percent"}, template=TEMPLATE)
+        fig.update_traces(hovertemplate="<b>%{label}</b><br>Percent: %{value:.2f}%<extra></extra>")
+        fig.update_layout(margin={"t": 40, "b": 40, "l": 0, "r": 0},
+                          coloraxis_colorbar=dict(title=spec.label))
+
+    else:
+        raise ValueError(f"Unknown chart kind: {spec.kind!r}")
+
+    return fig if (mode or CHART_MODE) == "full" else lean_figure(fig, spec.kind)
+
+
+# Trace settings Plotly Express writes into every trace that the trace type defaults to anyway
+_TRACE_DEFAULTS = {"alignmentgroup": None, "legendgroup": None, "offsetgroup": None, "showlegend": None,
+                   "textposition": None, "xaxis": None, "yaxis": None, "marker_pattern": None}
+
+
+def lean_figure(fig, kind):
+    """Shrink ``fig``'s JSON in place and return it.
+
+    The template only keeps the defaults of the trace type drawn (the full
+    template carries ~9 KB of defaults for two dozen types), the
+    hovertemplate every trace repeats moves into those defaults, and
+    settings that equal Plotly's defaults are dropped.
+    """
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    base = pio.templates[TEMPLATE]
+    defaults = base.data[kind][0].to_plotly_json() if base.data[kind] else {}
+    hovertemplates = {trace.hovertemplate for trace in fig.data}
+    if len(hovertemplates) == 1:
+        defaults["hovertemplate"] = hovertemplates.pop()
+        fig.update_traces(hovertemplate=None)
+    if kind == "bar":
+        fig.update_traces(**_TRACE_DEFAULTS)
+        defaults["orientation"] = fig.data[0].orientation
+        fig.update_traces(orientation=None)
+    fig.update_xaxes(anchor=None, domain=None)
+    fig.update_yaxes(anchor=None, domain=None)
+    fig.layout.template = go.layout.Template(layout=base.layout, data={kind: [defaults]})
+    return fig
+
+
+def build_comparison_figure(spec, frame, mode=None):
+    """Stacked percent bars comparing several regions for ``spec``.
+
+    Nested breakdowns (categories containing each other) have no shares of
+    one whole; they are drawn as grouped bars of the counts instead.
+    """
+    import plotly.express as px
+
+    n_regions = frame["Region"].nunique()
+    if spec.nested:
+        value, title, height = "Quantity", spec.title, max(400, 160 + 18 * len(spec.categories) * n_regions)
+        hover = "Quantity: %{x:,.0f}"
+    else:
+        value, title, height = "Percent", spec.title.replace("Number of", "Proportion of"), max(400, 160 + 28 * n_regions)
+        hover = "Percent: %{x:.2f}%"
+    fig = px.bar(frame, x=value, y="Region",
+                 color="Category", color_discrete_map=spec.colors,
+                 category_orders={"Category": spec.labels},
+                 title=title, labels={value: value, "Category": spec.label},
+                 barmode="group" if spec.nested else "stack", template=TEMPLATE, orientation="h",
+                 height=height)
+    fig.update_layout(xaxis_title=value, legend_title=spec.label,
+                      legend=dict(orientation="h", x=0.5, y=-0.15, xanchor="center", yanchor="top"))
+    fig.update_traces(hovertemplate=f"<b>%{{y}}</b><br>{spec.label}: %{{fullData.name}}<br>{hover}<extra></extra>")
+    fig.update_yaxes(autorange="reversed", title=None)
+    return fig if (mode or CHART_MODE) == "full" else lean_figure(fig, "bar")
@@ -0,0 +1,133 @@
+# Columnar (Arrow/Feather) cache compiled from the housing workbook
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.ipc as ipc
+except ImportError:  # pragma: no cover - the app falls back to the workbook
+    pa = None
+
+# Schema metadata key holding the SHA-256 of the workbook the cache was built from
+SOURCE_HASH_KEY = b"zensus22.source_sha256"
+
+# Schema metadata key holding the format version of the compiled files. Bump
+# CACHE_VERSION whenever the prepared frame's dtypes or metadata change, so
+# files written by older code read as stale instead of being attached.
+CACHE_VERSION_KEY = b"zensus22.cache_version"
+CACHE_VERSION = 2
+
+# Schema metadata key holding the suppressed cells as JSON {column: [row positions]}
+SUPPRESSED_KEY = b"zensus22.suppressed"
+
+
+def available():
+    return pa is not None
+
+
+def _zero_copy(arrow_type):
+    # Integer (count) columns stay Arrow arrays over the mapped file instead of
+    # being copied into masked arrays
+    return pd.ArrowDtype(arrow_type) if pa.types.is_integer(arrow_type) else None
+
+
+def _attach(path):
+    # split_blocks keeps pandas from consolidating (copying) same-typed columns
+    table = feather.read_table(str(path), memory_map=True)
+    return table, table.to_pandas(split_blocks=True, types_mapper=_zero_copy)
+
+
+def cache_path(source):
+    """Location of the compiled file for ``source``: data/.cache/<stem>.feather"""
+    source = Path(source)
+    return source.parent / ".cache" / f"{source.stem}.feather"
+
+
+def source_hash(path):
+    """Return the source hash stored in a compiled file, or None if unreadable or of another CACHE_VERSION."""
+    try:
+        with pa.memory_map(str(path)) as source:
+            metadata = ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    value = metadata.get(SOURCE_HASH_KEY)
+    if value is None or metadata.get(CACHE_VERSION_KEY) != str(CACHE_VERSION).encode():
+        return None
+    return value.decode()
+
+
+def _metadata(digest):
+    return {SOURCE_HASH_KEY: digest.encode(), CACHE_VERSION_KEY: str(CACHE_VERSION).encode()}
+
+
+def write_cache(df, suppressed, source, digest):
+    """Write ``df`` as an uncompressed Feather file so it can be memory-mapped."""
+    path = cache_path(source)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata.update(_metadata(digest))
+    metadata[SUPPRESSED_KEY] = json.dumps({col: rows.tolist() for col, rows in suppressed.items()}).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Write next to the target and rename, so readers never see a partial file
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    feather.write_feather(table, str(tmp), compression="uncompressed")
+    os.replace(tmp, path)
+    return path
+
+
+def read_cache(source, digest):
+    """Return (frame, suppressed cells) compiled for ``source`` or None if missing or stale."""
+    path = cache_path(source)
+    if not path.exists() or source_hash(path) != digest:
+        return None
+    table, df = _attach(path)
+    suppressed = json.loads((table.schema.metadata or {}).get(SUPPRESSED_KEY, b"{}"))
+    return df, {col: np.array(rows, dtype="int64") for col, rows in suppressed.items()}
+
+
+def derived_path(source, name):
+    """Location of a table derived from ``source``: data/.cache/<stem>.<name>.feather"""
+    source = Path(source)
+    return source.parent / ".cache" / f"{source.stem}.{name}.feather"
+
+
+def shared_frame(source, name, digest, build):
+    """Return ``build()`` from a memory-mapped file shared by every process.
+
+    The first process to need it writes the frame next to the compiled cache;
+    the others (and restarted workers) attach to the same pages read-only
+    instead of building their own copy. The file is rebuilt when ``digest``
+    no longer matches.
+    """
+    path = derived_path(source, name)
+    if source_hash(path) != digest:
+        df = build()
+        # Float columns keep NaN rather than nulls, so they attach without a copy as well
+        table = pa.table({col: pa.array(values.to_numpy(), from_pandas=False) if values.dtype == "float64"
+                          else pa.array(values) for col, values in df.items()})
+        table = table.replace_schema_metadata(_metadata(digest))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        feather.write_feather(table, str(tmp), compression="uncompressed")
+        os.replace(tmp, path)
+    return _attach(path)[1]
+
+
+def compile_workbook(source, force=False):
+    """Build the columnar cache for ``source`` unless it is already up to date."""
+    from zensus22.loader import _content_hash, read_workbook
+
+    digest = _content_hash(source)
+    path = cache_path(source)
+    if not force and source_hash(path) == digest:
+        return path, False
+    return write_cache(*read_workbook(source), source, digest), True
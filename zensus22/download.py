@@ -0,0 +1,161 @@
+# Bulk download of selected regions and dimensions as CSV or Parquet, streamed in row batches
+
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from zensus22.charts import CHARTS_BY_ID, METRICS
+from zensus22.hierarchy import key_column
+from zensus22.loader import DATA_PATH, REGION_LEVELS
+
+FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+# Selectable dimensions: the headline metrics and every chart breakdown
+DIMENSIONS = ["metrics"] + list(CHARTS_BY_ID)
+
+# Rows per batch; memory per download is bounded by one batch plus the writer's buffer
+BATCH_ROWS = 2000
+
+CACHE_DIR = DATA_PATH.parent / ".cache" / "downloads"
+MAX_CACHED = 64
+
+
+def columns(df, dimensions=None):
+    """Region columns followed by the columns of ``dimensions`` (all by default), in registry order."""
+    unknown = set(dimensions or ()) - set(DIMENSIONS)
+    if unknown:
+        raise KeyError(f"Unknown dimensions: {sorted(unknown)}")
+    selected = [d for d in DIMENSIONS if not dimensions or d in dimensions]
+    result = ["Region", "Regionalebene"] + ([key_column(df)] if key_column(df) else [])
+    for dimension in selected:
+        result += list(METRICS) if dimension == "metrics" else list(CHARTS_BY_ID[dimension].columns)
+    return result
+
+
+def rows(df, levels=None, region_ids=None):
+    """Row positions of the regions on ``levels`` and/or with ids ``region_ids`` (all if neither is given)."""
+    unknown = set(levels or ()) - set(REGION_LEVELS)
+    if unknown:
+        raise KeyError(f"Unknown levels: {sorted(unknown)}")
+    mask = np.ones(len(df), dtype=bool)
+    if levels:
+        mask &= df["Regionalebene"].astype(str).isin(levels).to_numpy()
+    if region_ids:
+        ids = np.asarray(region_ids, dtype="int64")
+        if ((ids < 0) | (ids >= len(df))).any():
+            raise KeyError("Unknown region ids")
+        selected = np.zeros(len(df), dtype=bool)
+        selected[ids] = True
+        mask &= selected
+    return np.flatnonzero(mask)
+
+
+def iter_batches(df, row_ids, column_names, batch_rows=BATCH_ROWS):
+    """Arrow record batches of the selected cells, ``batch_rows`` rows at a time."""
+    # One schema for all batches, taken from the column dtypes rather than a batch's values
+    # (a batch whose cells are all missing would otherwise infer a null column)
+    schema = pa.Schema.from_pandas(df.iloc[:0][column_names], preserve_index=False)
+    for col in ("Region", "Regionalebene"):
+        schema = schema.set(schema.get_field_index(col), pa.field(col, pa.string()))
+    for start in range(0, max(len(row_ids), 1), batch_rows):
+        part = df.iloc[row_ids[start:start + batch_rows]][column_names]
+        for col in ("Region", "Regionalebene"):
+            part[col] = part[col].astype(str)
+        yield pa.RecordBatch.from_pandas(part, schema=schema, preserve_index=False)
+
+
+class _Chunks(io.RawIOBase):
+    # Write-only sink handing what the writer produced so far to the streaming generator
+    def __init__(self):
+        self.parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def _encode(batches, fmt):
+    sink = _Chunks()
+    writer = None
+    for batch in batches:
+        if writer is None:
+            writer = (pq.ParquetWriter(sink, batch.schema) if fmt == "parquet"
+                      else pa_csv.CSVWriter(sink, batch.schema))
+        writer.write_batch(batch)
+        yield sink.take()
+    if writer is not None:
+        writer.close()
+    yield sink.take()
+
+
+def cache_key(version, fmt, levels, region_ids, dimensions):
+    """File name of the cached download for one query."""
+    query = json.dumps([version, fmt, sorted(levels or []), sorted(region_ids or []), sorted(dimensions or [])])
+    return f"{hashlib.sha256(query.encode()).hexdigest()[:32]}.{fmt}"
+
+
+def stream(df, version, fmt="csv", levels=None, region_ids=None, dimensions=None):
+    """Iterator over the encoded download, from the on-disk cache when the same query was served before.
+
+    The selection is checked right away (KeyError for an unknown format,
+    level, region or dimension); encoding starts when the iterator is
+    consumed. ``version`` identifies the dataset (e.g. ``dataset_version()``),
+    so the cache never serves data of an older workbook. A fresh download is
+    written to the cache while it streams and only kept once complete.
+    """
+    if fmt not in FORMATS:
+        raise KeyError(f"format must be one of {list(FORMATS)}")
+    column_names = columns(df, dimensions)
+    row_ids = rows(df, levels, region_ids)
+    path = CACHE_DIR / cache_key(version, fmt, levels, region_ids, dimensions)
+    return _chunks(df, fmt, row_ids, column_names, path)
+
+
+def _chunks(df, fmt, row_ids, column_names, path):
+    if path.exists():
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 16):
+                yield chunk
+        return
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{id(path)}.tmp")
+    complete = False
+    try:
+        with open(tmp, "wb") as f:
+            for chunk in _encode(iter_batches(df, row_ids, column_names), fmt):
+                f.write(chunk)
+                yield chunk
+        complete = True
+    finally:
+        if complete:
+            os.replace(tmp, path)
+            _trim()
+        else:
+            tmp.unlink(missing_ok=True)
+
+
+def _trim():
+    # Keep the MAX_CACHED most recently written downloads
+    files = sorted((p for p in CACHE_DIR.iterdir() if p.suffix.lstrip(".") in FORMATS),
+                   key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in files[MAX_CACHED:]:
+        stale.unlink(missing_ok=True)
+
+
+def to_bytes(df, version, fmt="csv", **selection):
+    """The whole download as bytes (for small selections, e.g. the app's download button)."""
+    return b"".join(stream(df, version, fmt, **selection))
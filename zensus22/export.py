@@ -0,0 +1,205 @@
+# Static export of every region's dashboard (HTML + JSON) for hosting without the app
+
+import hashlib
+import html
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import zensus22.charts as chart_registry
+from zensus22.charts import CHARTS, METRICS, build_figure
+from zensus22.facts import _layout_hash, fact_table
+from zensus22.figures import LAYOUT_VERSION
+from zensus22.index import region_index
+from zensus22.loader import DATA_PATH, REGION_LEVEL_TRANSLATIONS, REGION_LEVELS, json_value, load_wohnungen
+
+# Bump when the page template changes so every region is written again
+EXPORT_VERSION = 2
+
+MANIFEST = "manifest.json"
+PLOTLY_JS = "assets/plotly.min.js"
+
+# Chart layouts (with their template) are the same for every region and are
+# loaded once; region pages and data.json only carry the trace data
+LAYOUTS_JS = "assets/layouts.js"
+REGIONS_JSON = "assets/regions.json"
+
+_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Housing statistics for {name} (2022)</title>
+<script src="../{plotly_js}"></script>
+<script src="../{layouts_js}"></script>
+<style>
+body {{ font-family: sans-serif; margin: 2rem; }}
+.metrics {{ display: flex; gap: 3rem; margin-bottom: 2rem; }}
+.metrics div span {{ display: block; font-size: 2rem; }}
+.charts {{ display: grid; grid-template-columns: 1fr 1fr; gap: 2rem; }}
+</style>
+</head>
+<body>
+<p><a href="../index.html">All regions</a> <select id="switch" hidden></select></p>
+<h1>Housing statistics for <span id="name">{name}</span> (2022)</h1>
+<div class="metrics">{metrics}</div>
+<div class="charts">{charts}</div>
+<script>
+const METRICS = {metric_formats};
+function show(data) {{
+  document.getElementById("name").textContent = data.name;
+  document.title = `Housing statistics for ${{data.name}} (2022)`;
+  for (const [col, [unit, digits]] of Object.entries(METRICS)) {{
+    const value = data.metrics[col];
+    document.getElementById("metric-" + col).textContent = value === null ? "–" : value.toFixed(digits) + unit;
+  }}
+  // Only the traces change between regions; layouts stay on the client
+  for (const [id, traces] of Object.entries(data.charts)) Plotly.react("chart-" + id, traces, LAYOUTS[id]);
+}}
+show({data});
+// Switching regions fetches only the new region's data.json (needs http(s), not file://)
+fetch("../{regions_json}").then(r => r.json()).then(regions => {{
+  const select = document.getElementById("switch");
+  for (const r of regions) select.add(new Option(`${{r.name}} (${{r.level}})`, r.id, false, r.id === {region_id}));
+  select.hidden = false;
+  select.onchange = () => fetch(`../${{select.value}}/data.json`).then(r => r.json()).then(data => {{
+    show(data);
+    history.replaceState(null, "", `../${{data.id}}/index.html`);
+  }});
+}}).catch(() => {{}});
+</script>
+</body>
+</html>
+"""
+
+
+def _renderer():
+    # Everything besides the data that shapes a page: templates, chart and fact table layouts, chart mode
+    return [EXPORT_VERSION, LAYOUT_VERSION, _layout_hash(), chart_registry.CHART_MODE]
+
+
+def _fingerprint(df, region_id, renderer=None):
+    """Hash of everything a region's page is built from (``renderer`` defaults to ``_renderer()``)."""
+    row = df.iloc[region_id]
+    payload = json.dumps([renderer or _renderer(), [str(v) for v in row.tolist()]])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _outdated(fingerprints, manifest, out):
+    # Regions whose fingerprint differs from the last export's manifest or whose page is missing
+    return [int(i) for i, digest in fingerprints.items()
+            if manifest.get(i) != digest or not (out / i / "index.html").exists()]
+
+
+def _render(df, facts, region_id):
+    row = df.iloc[region_id]
+    name = str(row["Region"])
+
+    metrics = {col: json_value(float(row[col])) for col in METRICS}
+    charts = {spec.id: json.loads(build_figure(spec, facts.frame(region_id, spec.id)).to_json())["data"]
+              for spec in CHARTS}
+
+    data = {"id": region_id, "name": name, "level": str(row["Regionalebene"]),
+            "metrics": metrics, "charts": charts}
+
+    metric_html = "".join(
+        f'<div>{html.escape(label)}<span id="metric-{col}">'
+        f"{'–' if metrics[col] is None else html.escape(fmt % metrics[col])}</span></div>"
+        for col, (label, fmt) in METRICS.items())
+    chart_html = "".join(f'<div id="chart-{spec.id}"></div>' for spec in CHARTS)
+
+    page = _PAGE.format(name=html.escape(name), plotly_js=PLOTLY_JS, layouts_js=LAYOUTS_JS,
+                        regions_json=REGIONS_JSON, region_id=region_id, metrics=metric_html,
+                        charts=chart_html, metric_formats=_script_json(_metric_formats()),
+                        data=_script_json(data))
+    return page, data
+
+
+def _script_json(value):
+    # JSON that is safe inside a <script> element
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+
+def _metric_formats():
+    # printf formats of METRICS ("%.1f %%") as (unit, decimals) for the page script
+    formats = {}
+    for col, (_, fmt) in METRICS.items():
+        number, unit = fmt.split(" ", 1)
+        formats[col] = (" " + unit.replace("%%", "%"), int(number[2]))
+    return formats
+
+
+def _write_assets(df, facts, out):
+    # Layouts are taken from the first region; they do not depend on the region
+    layouts = {spec.id: json.loads(build_figure(spec, facts.frame(0, spec.id)).to_json())["layout"]
+               for spec in CHARTS}
+    (out / LAYOUTS_JS).write_text(f"const LAYOUTS = {_script_json(layouts)};\n", encoding="utf-8")
+
+    regions = [{"id": i, "name": name, "level": level}
+               for i, (name, level) in enumerate(zip(df["Region"].astype(str), df["Regionalebene"].astype(str)))]
+    (out / REGIONS_JSON).write_text(json.dumps(regions, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+
+
+def _export_chunk(source, out, region_ids):
+    # Runs in a worker process; the loader reads the compiled columnar cache
+    df = load_wohnungen(source)
+    facts = fact_table(df)
+    out = Path(out)
+    for region_id in region_ids:
+        page, data = _render(df, facts, region_id)
+        target = out / str(region_id)
+        target.mkdir(parents=True, exist_ok=True)
+        (target / "index.html").write_text(page, encoding="utf-8")
+        (target / "data.json").write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    return len(region_ids)
+
+
+def _write_index(df, out):
+    index = region_index(df)
+    sections = []
+    for level in REGION_LEVELS:
+        links = "".join(
+            f'<li><a href="{index.position(level, name)}/index.html">{html.escape(name)}</a></li>'
+            for name in index.regions.get(level, []))
+        sections.append(f"<h2>{html.escape(REGION_LEVEL_TRANSLATIONS[level])}</h2><ul>{links}</ul>")
+    page = ("<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\">"
+            "<title>Housing statistics 2022</title></head><body>"
+            "<h1>Housing statistics in Germany based on Zensus 2022</h1>"
+            + "".join(sections) + "</body></html>")
+    (out / "index.html").write_text(page, encoding="utf-8")
+
+
+def export_site(out, source=DATA_PATH, jobs=None, force=False, chunk_size=16):
+    """Write every region's page to ``out``, skipping regions whose inputs did not change.
+
+    Returns (written, skipped).
+    """
+    from plotly.offline import get_plotlyjs
+
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    df = load_wohnungen(source)
+
+    manifest_path = out / MANIFEST
+    manifest = {}
+    if manifest_path.exists() and not force:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+
+    renderer = _renderer()
+    fingerprints = {str(i): _fingerprint(df, i, renderer) for i in range(len(df))}
+    todo = _outdated(fingerprints, manifest, out)
+
+    js = out / PLOTLY_JS
+    js.parent.mkdir(parents=True, exist_ok=True)
+    if not js.exists() or force:
+        js.write_text(get_plotlyjs(), encoding="utf-8")
+    _write_assets(df, fact_table(df), out)
+
+    chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+    if chunks:
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            list(pool.map(_export_chunk, [str(source)] * len(chunks), [str(out)] * len(chunks), chunks))
+
+    _write_index(df, out)
+    manifest_path.write_text(json.dumps(fingerprints, indent=0), encoding="utf-8")
+    return len(todo), len(df) - len(todo)
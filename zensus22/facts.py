@@ -0,0 +1,109 @@
+# Long-format fact table of every categorical breakdown, built once per loaded frame
+
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from zensus22.charts import ALL_COLUMNS, CHARTS
+from zensus22.loader import derived, frame_source
+
+# Bump when the table's columns or how they are computed change, so shared files are rebuilt
+FACTS_VERSION = 2
+
+
+def shares(values, slices):
+    """Percent of each row's dimension total for a (regions x columns) array.
+
+    Missing counts stay NaN and do not add to the total; a total of zero gives NaN.
+    """
+    percent = np.full(values.shape, np.nan)
+    for s in slices:
+        block = values[:, s]
+        total = np.nansum(block, axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            percent[:, s] = np.where(total > 0, block / total * 100, np.nan)
+    return percent
+
+
+class FactTable:
+    """(region_id, dimension, category, quantity, percent) for all regions.
+
+    Rows are ordered by region, then dimension and category in registry order,
+    so every (region, dimension) pair is one contiguous block of rows and a
+    chart's data is a positional slice. ``region_id`` is the row position in
+    the loaded frame, as returned by ``RegionIndex.position``. Percent is
+    missing for nested breakdowns (see ``ChartSpec.nested``). A ``table``
+    built earlier for the same frame (e.g. attached from a shared file) is
+    used as is.
+    """
+
+    def __init__(self, df, table=None):
+        self.width = len(ALL_COLUMNS)
+        self.offsets = {}
+        start = 0
+        for spec in CHARTS:
+            self.offsets[spec.id] = slice(start, start + len(spec.categories))
+            start += len(spec.categories)
+        self.table = self._build(df) if table is None else table
+
+    def _build(self, df):
+        values = df[ALL_COLUMNS].to_numpy(dtype="float64", na_value=np.nan)
+        n_regions, n_columns = values.shape
+
+        dimensions = [spec.id for spec in CHARTS for _ in spec.categories]
+        categories = [label for spec in CHARTS for label in spec.labels]
+        region_ids = np.repeat(np.arange(n_regions), n_columns)
+
+        return pd.DataFrame({
+            "region_id": region_ids,
+            "Region": df["Region"].astype(str).to_numpy()[region_ids],
+            "dimension": pd.Categorical(np.tile(dimensions, n_regions), categories=[spec.id for spec in CHARTS]),
+            "Category": np.tile(np.array(categories, dtype=object), n_regions),
+            "Quantity": values.ravel(),
+            # Nested breakdowns (categories containing each other) have no shares
+            "Percent": shares(values, [self.offsets[spec.id] for spec in CHARTS if not spec.nested]).ravel(),
+        })
+
+    def frame(self, region_id, dimension):
+        """Rows of one region and dimension (a slice of ``table``)."""
+        s = self.offsets[dimension]
+        start = region_id * self.width
+        return self.table.iloc[start + s.start:start + s.stop]
+
+    def rows(self, region_ids, dimension):
+        """Rows of several regions for one dimension, gathered in a single take."""
+        s = self.offsets[dimension]
+        region_ids = np.asarray(region_ids, dtype="int64")
+        positions = region_ids[:, None] * self.width + np.arange(s.start, s.stop)
+        return self.table.iloc[positions.ravel()]
+
+    def share(self, region_ids, dimension, category):
+        """Percent of one category (position within the dimension) for several regions."""
+        positions = np.asarray(region_ids, dtype="int64") * self.width + self.offsets[dimension].start + category
+        return self.table["Percent"].to_numpy()[positions]
+
+
+def _layout_hash():
+    # The row layout (dimensions, columns, labels) the slices of a FactTable assume
+    layout = [FACTS_VERSION, [(spec.id, list(spec.columns), list(spec.labels)) for spec in CHARTS]]
+    return hashlib.sha256(json.dumps(layout).encode()).hexdigest()
+
+
+def _shared(df):
+    # The table of a loaded frame is written once and memory-mapped by every process;
+    # it is keyed on the workbook and the chart registry, so a changed registry rebuilds it
+    from zensus22 import columnar
+
+    source = frame_source(df)
+    if source is None or not columnar.available():
+        return FactTable(df)
+    path, digest = source
+    return FactTable(df, columnar.shared_frame(path, "facts", f"{digest}:{_layout_hash()}",
+                                               lambda: FactTable(df).table))
+
+
+def fact_table(df):
+    """Return the FactTable for ``df``, built once per loaded frame and shared between processes."""
+    return derived(df, "fact_table", _shared)
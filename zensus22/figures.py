@@ -0,0 +1,90 @@
+# Bounded cache of built Plotly figures, keyed by (region, chart, layout version)
+
+import os
+import threading
+from collections import OrderedDict
+
+from zensus22 import timing
+from zensus22.charts import CHARTS, build_figure
+from zensus22.facts import fact_table
+from zensus22.loader import derived
+
+# Bump when build_figure output changes so stale figures are not served
+LAYOUT_VERSION = 2
+
+# Memory cap in MB (measured as serialized figure JSON) and warm-up switch
+MAX_MB = float(os.environ.get("ZENSUS_FIGURE_CACHE_MB", "64"))
+WARM_UP = os.environ.get("ZENSUS_FIGURE_WARMUP", "") not in ("", "0")
+
+
+class FigureCache:
+    """LRU cache of figures for one loaded frame, bounded by approximate size."""
+
+    def __init__(self, facts, max_bytes=MAX_MB * 1024 * 1024):
+        self.facts = facts
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()  # key -> (figure, size)
+        self._lock = threading.Lock()
+
+    def figure(self, region_id, spec):
+        """Return the figure for ``spec`` in region ``region_id``, building it on a miss.
+
+        Cached figures are shared and must not be modified by the caller.
+        """
+        key = (region_id, spec.id, LAYOUT_VERSION)
+        with self._lock:
+            entry = self._figures.get(key)
+            if entry is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        with timing.stage("transform", spec.id):
+            frame = self.facts.frame(region_id, spec.id)
+        with timing.stage("figure", spec.id):
+            fig = build_figure(spec, frame)
+        size = len(fig.to_json())
+
+        with self._lock:
+            if key not in self._figures and size <= self.max_bytes:
+                self._figures[key] = (fig, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, evicted) = self._figures.popitem(last=False)
+                    self.bytes -= evicted
+        return fig
+
+    def warm_up(self, region_ids=None):
+        """Build every chart for ``region_ids`` (all regions by default)."""
+        if region_ids is None:
+            region_ids = range(len(self.facts.table) // self.facts.width)
+        for region_id in region_ids:
+            for spec in CHARTS:
+                self.figure(region_id, spec)
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._figures)
+
+
+def _build(df):
+    cache = FigureCache(fact_table(df))
+    if WARM_UP:
+        threading.Thread(target=cache.warm_up, name="figure-warmup", daemon=True).start()
+    return cache
+
+
+def figure_cache(df):
+    """Return the FigureCache for ``df``, created once per loaded frame.
+
+    With ZENSUS_FIGURE_WARMUP=1 every region is pre-rendered in a background thread.
+    """
+    return derived(df, "figure_cache", _build)
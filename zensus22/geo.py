@@ -0,0 +1,160 @@
+# Region boundaries for the map page: simplified once per detail level and cached compactly
+
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from zensus22.hierarchy import KEY_COLUMNS, KEY_PREFIX, KREIS, LAND, normalize_key
+from zensus22.loader import DATA_PATH, _content_hash, _stat_key
+
+# Boundary files (GeoJSON, WGS84) shipped in data/geo, one per region level.
+# Each feature carries its region key in one of the KEY_COLUMNS properties.
+GEO_DIR = DATA_PATH.parent / "geo"
+GEO_FILES = {LAND: "laender.geojson", KREIS: "kreise.geojson"}
+
+# Simplification tolerance in degrees per detail level
+DETAIL_LEVELS = {"coarse": 0.02, "medium": 0.005, "fine": 0.001}
+
+# Built GeoJSON per (level, detail, file mtime/size)
+_cache = {}
+_lock = threading.Lock()
+
+
+def geo_path(level):
+    return GEO_DIR / GEO_FILES[level]
+
+
+def available(level):
+    return level in GEO_FILES and geo_path(level).exists()
+
+
+def simplify(points, tolerance):
+    """Douglas-Peucker simplification of a closed ring given as an (n, 2) array."""
+    n = len(points)
+    if n <= 4 or tolerance <= 0:
+        return points
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        segment = points[start + 1:end] - a
+        direction = b - a
+        length = np.hypot(*direction)
+        if length == 0:
+            dist = np.hypot(segment[:, 0], segment[:, 1])
+        else:
+            dist = np.abs(direction[0] * segment[:, 1] - direction[1] * segment[:, 0]) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+
+    simplified = points[keep]
+    # A ring needs at least four points (closed triangle); keep the original otherwise
+    return simplified if len(simplified) >= 4 else points
+
+
+def _feature_key(feature, n):
+    properties = feature.get("properties") or {}
+    for col in KEY_COLUMNS:
+        if col in properties:
+            return normalize_key(properties[col], n)
+    return normalize_key(feature.get("id"), n)
+
+
+def _polygons(geometry):
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return []
+
+
+def compile_geometries(level, tolerance):
+    """Simplify every feature of ``level`` into flat float32 arrays.
+
+    Returns a dict of numpy arrays: ``ids``, ``coords`` (all points), and the
+    offsets ``rings`` (into coords), ``polygons`` (into rings) and
+    ``features`` (into polygons).
+    """
+    with open(geo_path(level), encoding="utf-8") as f:
+        collection = json.load(f)
+
+    ids, coords, rings, polygons, features = [], [], [0], [0], [0]
+    n_points = 0
+    for feature in collection["features"]:
+        key = _feature_key(feature, KEY_PREFIX[level])
+        if key is None or not feature.get("geometry"):
+            continue
+        for polygon in _polygons(feature["geometry"]):
+            for ring in polygon:
+                points = simplify(np.asarray(ring, dtype="float64")[:, :2], tolerance)
+                coords.append(points.astype("float32"))
+                n_points += len(points)
+                rings.append(n_points)
+            polygons.append(len(rings) - 1)
+        features.append(len(polygons) - 1)
+        ids.append(key)
+
+    return {
+        "ids": np.array(ids),
+        "coords": np.concatenate(coords) if coords else np.empty((0, 2), dtype="float32"),
+        "rings": np.array(rings, dtype="int64"),
+        "polygons": np.array(polygons, dtype="int64"),
+        "features": np.array(features, dtype="int64"),
+    }
+
+
+def _cache_file(level, detail, digest):
+    return DATA_PATH.parent / ".cache" / f"geo_{Path(GEO_FILES[level]).stem}_{detail}_{digest[:16]}.npz"
+
+
+def load_geometries(level, detail):
+    """Compact simplified geometries, read from data/.cache or compiled on first use."""
+    digest = _content_hash(geo_path(level))
+    path = _cache_file(level, detail, digest)
+    if path.exists():
+        with np.load(path) as arrays:
+            return {name: arrays[name] for name in arrays.files}
+
+    arrays = compile_geometries(level, DETAIL_LEVELS[detail])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.npz")
+    np.savez(tmp, **arrays)
+    tmp.replace(path)
+    return arrays
+
+
+def _to_geojson(arrays):
+    coords = np.round(arrays["coords"].astype("float64"), 5).tolist()
+    rings, polygons, features = arrays["rings"], arrays["polygons"], arrays["features"]
+    result = []
+    for f, key in enumerate(arrays["ids"].tolist()):
+        multipolygon = []
+        for p in range(features[f], features[f + 1]):
+            multipolygon.append([coords[rings[r]:rings[r + 1]] for r in range(polygons[p], polygons[p + 1])])
+        result.append({"type": "Feature", "id": key, "properties": {},
+                       "geometry": {"type": "MultiPolygon", "coordinates": multipolygon}})
+    return {"type": "FeatureCollection", "features": result}
+
+
+def geojson(level, detail="medium"):
+    """FeatureCollection for ``level`` with feature ids set to the normalized region key.
+
+    Built once per process, boundary file version and detail level; the
+    returned dict is shared and must not be modified.
+    """
+    key = (level, detail, _stat_key(geo_path(level)))
+    with _lock:
+        if key not in _cache:
+            _cache[key] = _to_geojson(load_geometries(level, detail))
+        return _cache[key]
@@ -0,0 +1,104 @@
+# Bund -> Land -> Kreis hierarchy derived from the census region keys
+
+import numpy as np
+import pandas as pd
+
+from zensus22.loader import METRIC_COLUMNS, REGION_LEVELS, derived
+
+BUND, LAND, KREIS = REGION_LEVELS
+
+# Candidate names of the region key column (Amtlicher Regionalschlüssel)
+KEY_COLUMNS = ("ARS", "_RS", "RS", "Regionalschlüssel", "Regionalschluessel", "AGS")
+
+# Key prefix length identifying a Land and a Kreis
+KEY_PREFIX = {LAND: 2, KREIS: 5}
+
+# Statistics precomputed over the children of each region
+AGGREGATES = ["count", "min", "median", "mean", "max"]
+
+
+def key_column(df):
+    for col in KEY_COLUMNS:
+        if col in df.columns:
+            return col
+    return None
+
+
+def normalize_key(key, n):
+    """First ``n`` digits of a region key, restoring leading zeros lost by Excel."""
+    if pd.isna(key):
+        return None
+    key = str(key).strip()
+    if key.endswith(".0"):
+        key = key[:-2]
+    if not key.isdigit():
+        return None
+    # Short Land/Kreis keys ("01", "01001"), 8-digit AGS and 12-digit ARS
+    for width in (2, 5, 8, 12):
+        if len(key) <= width:
+            key = key.zfill(width)
+            break
+    return key[:n] if len(key) >= n else None
+
+
+class Hierarchy:
+    """Parent/child links between region rows plus aggregates over each region's children.
+
+    ``parent[i]`` is the row position of region ``i``'s parent or -1;
+    ``children[i]`` the positions of its children, sorted by name. Kreise are
+    linked to their Land through the region key; without a key column only the
+    Länder are linked to the Bund.
+    """
+
+    def __init__(self, df):
+        levels = df["Regionalebene"].astype(str).to_numpy()
+        names = df["Region"].astype(str).to_numpy()
+        n = len(df)
+
+        self.parent = np.full(n, -1, dtype="int64")
+
+        bund = np.flatnonzero(levels == BUND)
+        if len(bund):
+            self.parent[levels == LAND] = bund[0]
+
+        col = key_column(df)
+        if col is not None:
+            keys = df[col].to_numpy()
+            lands = {}
+            for pos in np.flatnonzero(levels == LAND):
+                lands.setdefault(normalize_key(keys[pos], KEY_PREFIX[LAND]), pos)
+            lands.pop(None, None)
+            for pos in np.flatnonzero(levels == KREIS):
+                kreis = normalize_key(keys[pos], KEY_PREFIX[KREIS])
+                if kreis is not None:
+                    self.parent[pos] = lands.get(kreis[:KEY_PREFIX[LAND]], -1)
+
+        order = np.argsort(names, kind="stable")
+        self.children = {}
+        for pos in order:
+            if self.parent[pos] >= 0:
+                self.children.setdefault(int(self.parent[pos]), []).append(int(pos))
+        self.children = {k: np.array(v, dtype="int64") for k, v in self.children.items()}
+
+        # One groupby over all linked rows, done once
+        linked = self.parent >= 0
+        values = df.loc[linked, METRIC_COLUMNS].astype("float64")
+        self.aggregates = values.groupby(self.parent[linked]).agg(AGGREGATES)
+
+    def children_of(self, region_id):
+        return self.children.get(region_id, np.empty(0, dtype="int64"))
+
+    def parent_of(self, region_id):
+        parent = int(self.parent[region_id])
+        return None if parent < 0 else parent
+
+    def summary(self, region_id):
+        """Precomputed statistics of ``region_id``'s children: rows are metrics, columns AGGREGATES."""
+        if region_id not in self.aggregates.index:
+            return None
+        return self.aggregates.loc[region_id].unstack()
+
+
+def hierarchy(df):
+    """Return the Hierarchy for ``df``, built once per loaded frame."""
+    return derived(df, "hierarchy", Hierarchy)
@@ -0,0 +1,36 @@
+# Region lookups built once per loaded frame
+
+from zensus22.loader import derived
+
+
+class RegionIndex:
+    """Row position of every (Regionalebene, Region) pair and the sorted regions per level."""
+
+    def __init__(self, df):
+        levels = df["Regionalebene"].astype(str).tolist()
+        names = df["Region"].astype(str).tolist()
+
+        # First occurrence wins, as in the original boolean-mask lookups
+        self.positions = {}
+        for pos, key in enumerate(zip(levels, names)):
+            self.positions.setdefault(key, pos)
+
+        self.regions = {}
+        for level, name in self.positions:
+            self.regions.setdefault(level, []).append(name)
+        for names in self.regions.values():
+            names.sort()
+
+    def position(self, level, region):
+        """Row position of ``region`` on ``level``; raises KeyError if unknown."""
+        return self.positions[(level, region)]
+
+    def row(self, df, level, region):
+        """One-row frame for ``region`` on ``level``."""
+        pos = self.position(level, region)
+        return df.iloc[pos:pos + 1]
+
+
+def region_index(df):
+    """Return the RegionIndex for ``df``, built once per loaded frame."""
+    return derived(df, "region_index", RegionIndex)
@@ -0,0 +1,179 @@
+# Derived indicators: expressions over census columns, evaluated for all regions at once and memoized
+
+import ast
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from zensus22.charts import CHARTS_BY_ID
+from zensus22.loader import derived
+
+# Memoized results kept across loaded frames (a new workbook only recomputes what changed)
+MAX_RESULTS = 256
+
+
+@dataclass(frozen=True)
+class Indicator:
+    """A derived figure: ``expression`` over census column codes and other indicator ids.
+
+    Expressions use + - * /, numbers and two functions: ``sum(a, b, ...)``
+    adds its arguments treating missing values as 0, and ``total(<chart id>)``
+    is the sum of all category columns of a chart. A division by zero gives NaN.
+    """
+
+    id: str
+    label: str
+    expression: str
+    fmt: str = "%.1f %%"
+    tree: ast.Expression = field(init=False, repr=False, compare=False)
+    inputs: tuple = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        tree = ast.parse(self.expression, mode="eval")
+        object.__setattr__(self, "tree", tree)
+        object.__setattr__(self, "inputs", tuple(dict.fromkeys(_names(tree.body))))
+
+
+_OPERATORS = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide}
+
+
+def _names(node):
+    # Column codes and indicator ids the expression reads, validating its syntax on the way
+    if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+        return _names(node.left) + _names(node.right)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return _names(node.operand)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return []
+    if isinstance(node, ast.Name):
+        return [node.id]
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        if node.func.id == "sum":
+            return [name for arg in node.args for name in _names(arg)]
+        if (node.func.id == "total" and len(node.args) == 1 and isinstance(node.args[0], ast.Name)
+                and node.args[0].id in CHARTS_BY_ID):
+            return list(CHARTS_BY_ID[node.args[0].id].columns)
+    raise ValueError(f"Unsupported expression: {ast.unparse(node)}")
+
+
+def _evaluate(node, values):
+    if isinstance(node, ast.BinOp):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = _OPERATORS[type(node.op)](_evaluate(node.left, values), _evaluate(node.right, values))
+        if isinstance(node.op, ast.Div):
+            result = np.where(np.isfinite(result), result, np.nan)
+        return result
+    if isinstance(node, ast.UnaryOp):
+        return -_evaluate(node.operand, values)
+    if isinstance(node, ast.Constant):
+        return float(node.value)
+    if isinstance(node, ast.Name):
+        return values[node.id]
+    if node.func.id == "sum":
+        args = [_evaluate(arg, values) for arg in node.args]
+    else:
+        args = [values[code] for code in CHARTS_BY_ID[node.args[0].id].columns]
+    stacked = np.vstack(np.broadcast_arrays(*args))
+    # All arguments missing stays missing
+    return np.where(np.isnan(stacked).all(axis=0), np.nan, np.nansum(stacked, axis=0))
+
+
+INDICATORS = [
+    Indicator("fossil_share", "Share of fossil energy sources",
+              "100 * sum(ENERGIETRAEGER__1, ENERGIETRAEGER__2, ENERGIETRAEGER__7) / total(energietraeger)"),
+    Indicator("renewable_share", "Share of renewable energy sources",
+              "100 * sum(ENERGIETRAEGER__3, ENERGIETRAEGER__4, ENERGIETRAEGER__5) / total(energietraeger)"),
+    Indicator("rented_share", "Share of rented apartments", "100 * NUTZUNG__02 / total(nutzung)"),
+    # Bucket midpoints; the open classes count as 3 €/m² (under 4) and 21 €/m² (20 and more)
+    Indicator("mean_rent_estimate", "∅ Net cold rent per m² from rent classes",
+              "sum(3 * MIETE_EURM2_2__01, 5 * MIETE_EURM2_2__02, 7 * MIETE_EURM2_2__03, 9 * MIETE_EURM2_2__04,"
+              " 11 * MIETE_EURM2_2__05, 13 * MIETE_EURM2_2__06, 15 * MIETE_EURM2_2__07, 17 * MIETE_EURM2_2__08,"
+              " 19 * MIETE_EURM2_2__09, 21 * MIETE_EURM2_2__10) / total(miete)", fmt="%.2f €/m²"),
+]
+
+INDICATORS_BY_ID = {indicator.id: indicator for indicator in INDICATORS}
+
+
+def register(indicator):
+    """Add or replace a derived indicator."""
+    INDICATORS[:] = [i for i in INDICATORS if i.id != indicator.id] + [indicator]
+    INDICATORS_BY_ID[indicator.id] = indicator
+
+
+# (indicator id, fingerprint of its expression and inputs) -> values
+_results = OrderedDict()
+_lock = threading.RLock()
+stats = {"hits": 0, "misses": 0}
+
+
+class _Frame:
+    """Per-frame column arrays and fingerprints, filled on first use."""
+
+    def __init__(self, df):
+        self.df = df
+        self.columns = {}
+        self.fingerprints = {}
+
+    def column(self, code):
+        if code not in self.columns:
+            self.columns[code] = self.df[code].to_numpy(dtype="float64", na_value=np.nan)
+        return self.columns[code]
+
+    def fingerprint(self, name, visiting=()):
+        # Hash of an indicator's expression and inputs (not stored: indicators can be
+        # re-registered), or the stored content hash of a column
+        if name in INDICATORS_BY_ID:
+            if name in visiting:
+                raise ValueError(f"Indicator {name!r} depends on itself")
+            indicator = INDICATORS_BY_ID[name]
+            digest = hashlib.sha256(indicator.expression.encode())
+            for dependency in indicator.inputs:
+                digest.update(self.fingerprint(dependency, visiting + (name,)).encode())
+            return digest.hexdigest()
+        if name not in self.fingerprints:
+            self.fingerprints[name] = hashlib.sha256(self.column(name).tobytes()).hexdigest()
+        return self.fingerprints[name]
+
+
+def evaluate(df, indicator_id):
+    """Values of indicator ``indicator_id`` for every row of ``df``.
+
+    Results are memoized by the content of their input columns, so an
+    indicator is only computed again when one of its inputs (or its
+    expression) changes. The returned array is shared and read-only.
+    """
+    frame = derived(df, "indicator_inputs", _Frame)
+    with _lock:
+        return _value(frame, INDICATORS_BY_ID[indicator_id])
+
+
+def _value(frame, indicator):
+    key = (indicator.id, frame.fingerprint(indicator.id))
+    if key in _results:
+        _results.move_to_end(key)
+        stats["hits"] += 1
+        return _results[key]
+
+    stats["misses"] += 1
+    values = {}
+    for name in indicator.inputs:
+        if name in INDICATORS_BY_ID:
+            values[name] = _value(frame, INDICATORS_BY_ID[name])
+        else:
+            values[name] = frame.column(name)
+    result = np.broadcast_to(np.asarray(_evaluate(indicator.tree.body, values), dtype="float64"),
+                             (len(frame.df),)).copy()
+    result.flags.writeable = False
+
+    _results[key] = result
+    while len(_results) > MAX_RESULTS:
+        _results.popitem(last=False)
+    return result
+
+
+def evaluate_all(df):
+    """{indicator id: values} of every registered indicator."""
+    return {indicator.id: evaluate(df, indicator.id) for indicator in INDICATORS}
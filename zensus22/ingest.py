@@ -0,0 +1,155 @@
+# Incremental ingest of the census tables into one columnar store joined on the region key
+
+import json
+import os
+
+import pandas as pd
+
+from zensus22.hierarchy import BUND, KEY_PREFIX, key_column, normalize_key
+from zensus22.loader import DATA_PATH, REGION_LEVELS, _content_hash, smallest_int_dtype
+from zensus22.schema import ID_COLUMNS, TABLES, TABLES_BY_NAME, Column, describe
+
+STORE_DIR = DATA_PATH.parent / ".cache" / "store"
+STORE_FILE = "zensus.feather"
+MANIFEST = "manifest.json"
+
+# Join key: normalized region key, or level and name for rows without a usable key
+JOIN_KEY = "region_key"
+
+# Join key of the Bund row, whose ARS ("DG") is not numeric
+BUND_KEY = "DG"
+
+# Bump when the per-table files change (e.g. the join key), so every table is read again
+STORE_VERSION = 2
+
+
+def source_path(table):
+    return DATA_PATH.parent / TABLES_BY_NAME[table].file
+
+
+def _join_key(level, name, key):
+    # Lands and Kreise by their key prefix (short "01" and full 12-digit keys match),
+    # other levels by the full 12-digit key; level and name when there is no usable key
+    if level == BUND:
+        return BUND_KEY
+    normalized = normalize_key(key, KEY_PREFIX.get(level, 12))
+    return normalized if normalized is not None else f"{level}|{name}"
+
+
+def _join_keys(df):
+    col = key_column(df)
+    keys = df[col] if col is not None else [None] * len(df)
+    return pd.Series([_join_key(level, name, key) for level, name, key in
+                      zip(df["Regionalebene"].astype(str), df["Name"].astype(str), keys)], index=df.index)
+
+
+def read_table(table, path=None):
+    """Read one census table, keep the app's region levels and type every column by the registry.
+
+    Count columns get the smallest nullable integer dtype that fits. Value
+    columns are renamed to ``<table>.<code>`` so tables sharing codes
+    (e.g. HEIZTYP in buildings and apartments) do not collide. Returns the
+    frame and the list of Column descriptions of its value columns.
+    """
+    df = pd.read_excel(path or source_path(table))
+    df = df[df["Regionalebene"].isin(REGION_LEVELS)].reset_index(drop=True)
+
+    out = pd.DataFrame({JOIN_KEY: _join_keys(df),
+                        "Region": df["Name"].replace("Deutschland", "Germany").astype("category"),
+                        "Regionalebene": df["Regionalebene"].astype("category")})
+    columns = []
+    for code in df.columns:
+        if code in ID_COLUMNS or code == key_column(df):
+            continue
+        values = pd.to_numeric(df[code], errors="coerce")
+        column = describe(code)
+        if column is None:
+            if values.isna().all():
+                continue
+            column = Column(code, "other", code, "float")
+        if column.dtype == "count":
+            values = values.round()
+            values = values.astype(smallest_int_dtype(values))
+        out[f"{table}.{code}"] = values
+        columns.append(column)
+    return out, columns
+
+
+def _load_manifest():
+    path = STORE_DIR / MANIFEST
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))
+    return {}
+
+
+def _write(df, path):
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    df.to_feather(tmp, compression="uncompressed")
+    os.replace(tmp, path)
+
+
+def ingest(tables=None, force=False):
+    """Bring the store up to date; only tables whose source file changed are read again.
+
+    Missing source files are skipped. Returns the names of the tables that
+    were (re)processed.
+    """
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest()
+    names = tables or [table.name for table in TABLES]
+
+    processed = []
+    for name in names:
+        path = source_path(name)
+        if not path.exists():
+            continue
+        digest = _content_hash(path)
+        entry = manifest.get(name)
+        if (not force and entry and entry["sha256"] == digest and entry.get("version") == STORE_VERSION
+                and (STORE_DIR / f"{name}.feather").exists()):
+            continue
+
+        df, columns = read_table(name, path)
+        _write(df, STORE_DIR / f"{name}.feather")
+        manifest[name] = {
+            "sha256": digest,
+            "version": STORE_VERSION,
+            "columns": {f"{name}.{c.code}": {"dimension": c.dimension, "label": c.label, "dtype": c.dtype}
+                        for c in columns},
+        }
+        processed.append(name)
+
+    if processed or not (STORE_DIR / STORE_FILE).exists():
+        _combine([name for name in manifest if (STORE_DIR / f"{name}.feather").exists()])
+        (STORE_DIR / MANIFEST).write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+    return processed
+
+
+def _combine(names):
+    # Outer join of the per-table files on the region key; the first table provides names and levels
+    combined = None
+    for name in names:
+        df = pd.read_feather(STORE_DIR / f"{name}.feather")
+        if combined is None:
+            combined = df
+            continue
+        combined = combined.merge(df, on=JOIN_KEY, how="outer", suffixes=("", f".{name}"))
+        for col in ("Region", "Regionalebene"):
+            combined[col] = combined[col].astype(object).fillna(combined.pop(f"{col}.{name}").astype(object)).astype("category")
+    if combined is not None:
+        _write(combined, STORE_DIR / STORE_FILE)
+
+
+def load_store():
+    """The combined store and the column descriptions from the manifest.
+
+    Count columns stay Arrow arrays over the memory-mapped file; the other
+    columns are copied into pandas.
+    """
+    from zensus22.columnar import _attach
+
+    columns = {}
+    for entry in _load_manifest().values():
+        for code, column in entry["columns"].items():
+            columns[code] = Column(code, **column)
+    return _attach(STORE_DIR / STORE_FILE)[1], columns
@@ -0,0 +1,248 @@
+# Load the Zensus 2022 housing workbook once per process
+
+import hashlib
+import math
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DATA_PATH = Path(__file__).resolve().parent.parent / "data" / "Data_wohnungen.xlsx"
+
+# Region levels shown in the app
+REGION_LEVELS = ["Bund", "Land", "Stadtkreis/kreisfreie Stadt/Landkreis"]
+
+# Translate region level
+REGION_LEVEL_TRANSLATIONS = {
+    "Bund": "Federal",
+    "Land": "State",
+    "Stadtkreis/kreisfreie Stadt/Landkreis": "Urban district/independent city/rural district"}
+
+# Headline metrics (rates and averages)
+METRIC_COLUMNS = ["QMMIETE", "LEQ", "ETQ", "FLAECHE"]
+
+# Apartment counts per category. "NERGIETRAEGER__8" is spelled this way in the source file.
+COUNT_PREFIXES = ("GEBAEUDEART_SYS_", "EIGENTUM__", "HEIZTYP__", "ENERGIETRAEGER__",
+                  "NERGIETRAEGER__", "NUTZUNG__", "MIETE_EURM2_2__", "WOHNFLAECHE_20S__",
+                  "RAUMANZAHL__")
+
+# Cell values the census uses for suppressed or unavailable figures
+SUPPRESSED_VALUES = ("-", "/")
+
+# Parsed workbooks: resolved path -> (stat key, content hash, frame)
+_cache = {}
+
+# Objects built from a cached frame (indexes, tables): id(frame) -> {name: value}
+_derived = {}
+
+_lock = threading.RLock()
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def prepare(df):
+    """Apply the region filter, rename and translation used by the app.
+
+    Returns the typed frame and its suppressed cells (see ``coerce_types``).
+    """
+
+    # Filter by Land and Bund and Stadtkreis/kreisfreie Stadt/Landkreis
+    df = df[df["Regionalebene"].isin(REGION_LEVELS)]
+
+    # Rename column
+    df = df.rename(columns={"Name": "Region"})
+
+    # Replace "Deutschland" with "Germany"
+    df["Region"] = df["Region"].replace("Deutschland", "Germany")
+
+    return coerce_types(df.reset_index(drop=True))
+
+
+def count_columns(df):
+    return [c for c in df.columns if c.startswith(COUNT_PREFIXES)]
+
+
+def smallest_int_dtype(values):
+    """Smallest nullable integer dtype holding ``values`` (float64 if they are not whole numbers)."""
+    valid = values.dropna()
+    if len(valid) and not np.array_equal(valid, np.round(valid)):
+        return "float64"
+    lo, hi = (valid.min(), valid.max()) if len(valid) else (0, 0)
+    candidates = ("UInt8", "UInt16", "UInt32", "UInt64") if lo >= 0 else ("Int8", "Int16", "Int32", "Int64")
+    for dtype in candidates:
+        info = np.iinfo(dtype.lower())
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return "float64"
+
+
+def _suppressed_rows(raw):
+    if raw.dtype != object and not pd.api.types.is_string_dtype(raw):
+        return np.empty(0, dtype="int64")
+    return np.flatnonzero(raw.astype(str).str.strip().isin(SUPPRESSED_VALUES).to_numpy())
+
+
+def coerce_types(df):
+    """Give every column its compact dtype, once at load time.
+
+    Region columns become categoricals, metrics float64 and count columns the
+    smallest nullable integer dtype that fits. Suppressed census cells ("-",
+    "/") become missing values; their row positions are returned per column
+    so they can be told apart from cells that are simply empty.
+    Returns (frame, {column: row positions}).
+    """
+    df = df.copy()
+    suppressed = {}
+    for col in ["Region", "Regionalebene"]:
+        df[col] = df[col].astype("category")
+    for col in METRIC_COLUMNS + count_columns(df):
+        if col not in df.columns:
+            continue
+        rows = _suppressed_rows(df[col])
+        if len(rows):
+            suppressed[col] = rows
+        values = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        if col not in METRIC_COLUMNS:
+            values = values.astype(smallest_int_dtype(values))
+        df[col] = values
+    return df, suppressed
+
+
+def memory_report(df):
+    """Bytes held by ``df`` compared with the same data as object strings and float64."""
+    compact = int(df.memory_usage(deep=True).sum())
+    wide = df.astype({col: object if col in ("Region", "Regionalebene") else "float64"
+                      for col in METRIC_COLUMNS + count_columns(df) + ["Region", "Regionalebene"]
+                      if col in df.columns})
+    baseline = int(wide.memory_usage(deep=True).sum())
+    return {"compact_bytes": compact, "baseline_bytes": baseline,
+            "dtypes": {str(k): int(v) for k, v in df.dtypes.astype(str).value_counts().items()}}
+
+
+def read_workbook(path=DATA_PATH):
+    """Parse the workbook without caching; returns (frame, suppressed cells)."""
+    return prepare(pd.read_excel(path))
+
+
+def _read(path, digest):
+    # Prefer the compiled columnar file, recompiling it when it is stale
+    from zensus22 import columnar
+
+    if not columnar.available():
+        return read_workbook(path)
+
+    cached = columnar.read_cache(path, digest)
+    if cached is None:
+        columnar.write_cache(*read_workbook(path), path, digest)
+        # Attach to the file just written, like every other process does
+        cached = columnar.read_cache(path, digest)
+    return cached
+
+
+def load_wohnungen(path=DATA_PATH):
+    """Return the prepared housing frame, parsing the workbook only when it changed.
+
+    The cache is keyed on the resolved path, the file's mtime/size and the
+    SHA-256 of its content. The content is only re-hashed when mtime or size
+    differ, so an unchanged file costs a single ``stat`` per call. A cold
+    process reads the compiled columnar cache (see ``zensus22.columnar``)
+    instead of the workbook when it matches the content hash; its count
+    columns stay Arrow arrays over the memory-mapped file, so worker
+    processes share one copy of the data. The returned frame is shared
+    between callers and must not be modified.
+    """
+    key = str(Path(path).resolve())
+    stat_key = _stat_key(key)
+
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == stat_key:
+            return entry[2]
+
+        digest = _content_hash(key)
+        if entry is not None and entry[1] == digest:
+            # Touched but unchanged
+            _cache[key] = (stat_key, digest, entry[2])
+            return entry[2]
+
+        df, suppressed = _read(key, digest)
+        if entry is not None:
+            _derived.pop(id(entry[2]), None)
+        _cache[key] = (stat_key, digest, df)
+        _derived[id(df)] = {"suppressed": suppressed}
+        return df
+
+
+def frame_source(df):
+    """(resolved path, content hash) of a frame returned by ``load_wohnungen``, or None."""
+    with _lock:
+        for key, (_, digest, frame) in _cache.items():
+            if frame is df:
+                return key, digest
+    return None
+
+
+def json_value(value):
+    """``value`` with NaN (suppressed or missing cells) replaced by None for JSON output."""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def dataset_version(path=DATA_PATH):
+    """Content hash of the workbook behind ``load_wohnungen(path)``."""
+    load_wohnungen(path)
+    with _lock:
+        return _cache[str(Path(path).resolve())][1]
+
+
+def suppressed_cells(df):
+    """{column: row positions} of the cells published as suppressed ("-", "/") in ``df``."""
+    return derived(df, "suppressed", lambda df: {})
+
+
+def suppression_mask(df):
+    """Boolean frame marking suppressed cells, aligned with ``df``."""
+    mask = pd.DataFrame(False, index=df.index, columns=df.columns)
+    for col, rows in suppressed_cells(df).items():
+        mask.iloc[rows, mask.columns.get_loc(col)] = True
+    return mask
+
+
+def derived(df, name, build):
+    """Return ``build(df)``, computed once for each frame held in the cache.
+
+    Frames that did not come from ``load_wohnungen`` are not memoized.
+    """
+    with _lock:
+        if not any(entry[2] is df for entry in _cache.values()):
+            return build(df)
+        values = _derived.setdefault(id(df), {})
+        if name not in values:
+            values[name] = build(df)
+        return values[name]
+
+
+def invalidate(path=None):
+    """Drop the cached frame for ``path``, or every cached frame if omitted."""
+    with _lock:
+        if path is None:
+            _cache.clear()
+            _derived.clear()
+        else:
+            entry = _cache.pop(str(Path(path).resolve()), None)
+            if entry is not None:
+                _derived.pop(id(entry[2]), None)
@@ -0,0 +1,82 @@
+# Choropleth component for the map page: boundaries go to the browser once, a recolor sends only the values
+
+import json
+import threading
+
+from zensus22.geo import geojson
+
+# Runs in the app page (not an iframe). Plotly and the boundaries are kept on
+# window, so they survive reruns and page switches of the session; the
+# component reports what it holds in its "cached" state, and the server only
+# includes what is missing. Plotly.react diffs against the drawn figure, so a
+# new indicator only recolors the existing shapes.
+_JS = """
+export default function (component) {
+  const { data, parentElement, setStateValue } = component;
+  const cache = (window.zensus22Map ||= { geometries: {} });
+  if (data.plotly && !window.Plotly) {
+    const script = document.createElement("script");
+    script.textContent = data.plotly;
+    document.head.appendChild(script);
+  }
+  if (data.geometry) cache.geometries[data.geometry_key] = data.geometry;
+
+  const held = Object.keys(cache.geometries).concat(window.Plotly ? ["plotly"] : []).sort();
+  if (JSON.stringify(held) !== JSON.stringify(data.cached)) setStateValue("cached", held);
+  const geometry = cache.geometries[data.geometry_key];
+  if (!window.Plotly || !geometry) return;
+
+  let div = parentElement.querySelector(".zensus22-map");
+  if (!div) {
+    div = document.createElement("div");
+    div.className = "zensus22-map";
+    parentElement.appendChild(div);
+  }
+  const traces = data.figure.data.map(trace => ({ ...trace, geojson: geometry }));
+  window.Plotly.react(div, traces, data.figure.layout, { responsive: true, displaylogo: false });
+}
+"""
+
+_component = None
+_plotly_js = None
+_lock = threading.Lock()
+
+
+def _mount():
+    global _component
+    with _lock:
+        if _component is None:
+            import streamlit as st
+
+            _component = st.components.v2.component("zensus22_choropleth", js=_JS, isolate_styles=False)
+        return _component
+
+
+def _plotly():
+    # plotly.js shipped with the Python package (no CDN), read once per process
+    global _plotly_js
+    with _lock:
+        if _plotly_js is None:
+            from plotly.offline import get_plotlyjs
+
+            _plotly_js = get_plotlyjs()
+        return _plotly_js
+
+
+def choropleth(fig, level, detail, key="map"):
+    """Draw ``fig`` (a Choropleth figure without ``geojson``) on the boundaries of ``level``.
+
+    The boundaries and plotly.js are only sent when the browser does not
+    hold them yet, so changing the indicator transfers the new values and
+    not the polygons.
+    """
+    import streamlit as st
+
+    geometry_key = f"{level}/{detail}"
+    cached = (st.session_state.get(key) or {}).get("cached") or []
+    data = {"geometry_key": geometry_key, "cached": cached, "figure": json.loads(fig.to_json())}
+    if geometry_key not in cached:
+        data["geometry"] = geojson(level, detail)
+    if "plotly" not in cached:
+        data["plotly"] = _plotly()
+    return _mount()(key=key, data=data, default={"cached": []}, on_cached_change=lambda: None)
@@ -0,0 +1,105 @@
+# Ranks and percentiles of every region within its level, precomputed once per loaded frame
+
+import numpy as np
+
+from zensus22.charts import CHARTS, METRICS
+from zensus22.facts import fact_table
+from zensus22.loader import derived
+
+# Ranked indicators: headline metrics and the share of every chart category ("<chart id>:<position>").
+# Nested breakdowns (building type: totals and their parts) have no meaningful shares and are left out.
+SHARE_CHARTS = [spec for spec in CHARTS if not spec.nested]
+
+INDICATORS = {col: label.rstrip("*") for col, (label, _) in METRICS.items()}
+for _spec in SHARE_CHARTS:
+    for _i, _category in enumerate(_spec.labels):
+        INDICATORS[f"{_spec.id}:{_i}"] = f"Share: {_category} ({_spec.label})"
+del _spec, _i, _category
+
+
+def share_key(dimension, category):
+    """Indicator key of the share of category position ``category`` in chart ``dimension``."""
+    return f"{dimension}:{category}"
+
+
+class Rankings:
+    """Rank (1 = highest value) and percentile of each region among the regions of its level.
+
+    Ties share the best rank. Regions without a value (suppressed or empty
+    cells) get rank 0 and a NaN percentile and are left out of the counts
+    and the top/bottom lists. Every lookup is an array index.
+    """
+
+    def __init__(self, df, facts):
+        n = len(df)
+        self.keys = list(INDICATORS)
+        self.columns = {key: j for j, key in enumerate(self.keys)}
+
+        metrics = df[list(METRICS)].to_numpy(dtype="float64", na_value=np.nan)
+        shares = facts.table["Percent"].to_numpy(dtype="float64").reshape(n, facts.width)
+        shares = shares[:, np.r_[tuple(facts.offsets[spec.id] for spec in SHARE_CHARTS)]]
+        self.values = np.hstack([metrics, shares])
+
+        self.levels = df["Regionalebene"].astype(str).to_numpy()
+        self.ranks = np.zeros(self.values.shape, dtype="int32")
+        self.percentiles = np.full(self.values.shape, np.nan)
+        self.counts = {}  # level -> regions with a value, per indicator
+        self.order = {}   # level -> (indicators x regions) region ids, highest value first, missing last
+
+        for level in dict.fromkeys(self.levels):
+            members = np.flatnonzero(self.levels == level)
+            block = self.values[members]
+            missing = np.isnan(block)
+            # Descending order with missing values last
+            keyed = np.where(missing, np.inf, -block)
+            order = np.argsort(keyed, axis=0, kind="stable")
+            ordered = np.take_along_axis(keyed, order, axis=0)
+
+            count = (~missing).sum(axis=0)
+            ranks = np.empty(block.shape, dtype="int32")
+            for j in range(block.shape[1]):
+                ranks[:, j] = np.searchsorted(ordered[:, j], keyed[:, j], side="left") + 1
+            ranks[missing] = 0
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                percentiles = np.where(count > 1, (count - ranks) / (count - 1) * 100, 100.0)
+            percentiles[missing] = np.nan
+
+            self.ranks[members] = ranks
+            self.percentiles[members] = percentiles
+            self.counts[level] = count
+            self.order[level] = members[order].T
+
+    def rank(self, region_id, key):
+        """(rank, number of ranked regions on the level, percentile) of a region for indicator ``key``."""
+        j = self.columns[key]
+        return (int(self.ranks[region_id, j]), int(self.counts[self.levels[region_id]][j]),
+                float(self.percentiles[region_id, j]))
+
+    def value(self, region_id, key):
+        return float(self.values[region_id, self.columns[key]])
+
+    def breakdown(self, region_id, spec):
+        """Share, rank and percentile of every category of chart ``spec`` (one of SHARE_CHARTS) for one region."""
+        rows = []
+        for i, category in enumerate(spec.labels):
+            rank, count, percentile = self.rank(region_id, share_key(spec.id, i))
+            rows.append({"Category": category, "Share": self.value(region_id, share_key(spec.id, i)),
+                         "Rank": f"{rank} of {count}" if rank else None, "Percentile": percentile})
+        return rows
+
+    def top(self, level, key, n=10):
+        """Region ids with the highest values of ``key`` on ``level``, best first."""
+        j = self.columns[key]
+        return self.order[level][j, :min(n, self.counts[level][j])]
+
+    def bottom(self, level, key, n=10):
+        """Region ids with the lowest values of ``key`` on ``level``, lowest first."""
+        j = self.columns[key]
+        count = self.counts[level][j]
+        return self.order[level][j, max(0, count - n):count][::-1]
+
+
+def rankings(df):
+    """Return the Rankings for ``df``, computed once per loaded frame."""
+    return derived(df, "rankings", lambda df: Rankings(df, fact_table(df)))
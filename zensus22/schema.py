@@ -0,0 +1,72 @@
+# Schema registry: census column codes -> typed, labelled dimensions
+
+import re
+from dataclasses import dataclass
+
+from zensus22.charts import CHARTS, METRICS
+
+
+@dataclass(frozen=True)
+class Column:
+    """One census column: the dimension it belongs to, its category label and dtype."""
+
+    code: str
+    dimension: str
+    label: str
+    dtype: str          # "count" (apartments, buildings, persons, ...) or "float"
+
+
+@dataclass(frozen=True)
+class Table:
+    """One census table of the release, stored under ``name`` in the combined store."""
+
+    name: str
+    file: str
+    title: str
+
+
+# Tables of the Zensus 2022 release that can be ingested (files in data/)
+TABLES = [
+    Table("wohnungen", "Data_wohnungen.xlsx", "Apartments (Wohnungen)"),
+    Table("gebaeude", "Data_gebaeude.xlsx", "Buildings (Gebäude)"),
+    Table("bevoelkerung", "Data_bevoelkerung.xlsx", "Population (Bevölkerung)"),
+    Table("haushalte", "Data_haushalte.xlsx", "Households (Haushalte)"),
+]
+
+TABLES_BY_NAME = {table.name: table for table in TABLES}
+
+# Codes of count columns: <DIMENSION>_<n> or <DIMENSION>__<nn>
+_COUNT_CODE = re.compile(r"^(?P<dimension>[A-Z][A-Z0-9_]*?)_{1,2}(?P<category>\d+)$")
+
+# Source columns that identify a region rather than hold values
+ID_COLUMNS = {"Name", "Region", "Regionalebene"}
+
+# Known columns, keyed by code. The apartment table is described by the chart
+# registry; columns of other tables fall back to the code pattern above.
+REGISTRY = {}
+for _spec in CHARTS:
+    for _code, _label in _spec.categories:
+        # "NERGIETRAEGER__8" is spelled this way in the source file
+        REGISTRY[_code] = Column(_code, _spec.id, _label, "count")
+for _code, (_label, _) in METRICS.items():
+    REGISTRY[_code] = Column(_code, "metrics", _label.rstrip("*"), "float")
+del _spec, _code, _label
+
+
+def register(column):
+    """Add or replace the description of a census column."""
+    REGISTRY[column.code] = column
+
+
+def describe(code):
+    """Column description for ``code``; unknown codes are inferred from their shape.
+
+    Returns None for columns that are neither registered nor look like a
+    count (e.g. free text or identifiers).
+    """
+    if code in REGISTRY:
+        return REGISTRY[code]
+    match = _COUNT_CODE.match(code)
+    if match:
+        return Column(code, match["dimension"].lower(), code, "count")
+    return None
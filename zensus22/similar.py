@@ -0,0 +1,98 @@
+# "Regions like this one": nearest neighbours over normalized census profiles
+
+import threading
+
+import numpy as np
+
+from zensus22.charts import CHARTS_BY_ID
+from zensus22.loader import DATA_PATH, dataset_version, derived
+
+# Breakdowns forming a region's profile: rent, living area, rooms, heating and energy source
+PROFILE = ("miete", "wohnflaeche", "raumanzahl", "heiztyp", "energietraeger")
+
+
+class SimilarityIndex:
+    """Profile matrix of all regions of a frame for k-nearest-neighbour queries.
+
+    A region's profile is the share of every category within each breakdown
+    of PROFILE, so regions of different size are comparable and every
+    breakdown weighs the same (each block sums to 1). Missing shares
+    (suppressed or empty cells) take the column mean. Distances are
+    Euclidean and computed for all candidates in one matrix-vector product.
+    """
+
+    def __init__(self, df, dimensions=PROFILE):
+        blocks = []
+        for dimension in dimensions:
+            values = df[list(CHARTS_BY_ID[dimension].columns)].to_numpy(dtype="float64", na_value=np.nan)
+            total = np.nansum(values, axis=1, keepdims=True)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                blocks.append(np.where(total > 0, values / total, np.nan))
+        profile = np.hstack(blocks)
+
+        # Regions without any counts cannot be compared
+        self.valid = ~np.isnan(profile).all(axis=1)
+        means = np.nan_to_num(np.nanmean(profile[self.valid], axis=0)) if self.valid.any() else 0.0
+        self.profile = np.where(np.isnan(profile), means, profile)
+        self.norms = np.einsum("ij,ij->i", self.profile, self.profile)
+
+        self.levels = df["Regionalebene"].astype(str).to_numpy()
+        self.members = {level: np.flatnonzero((self.levels == level) & self.valid)
+                        for level in dict.fromkeys(self.levels)}
+
+    def nearest(self, vector, k=10, level=None, exclude=None):
+        """(region ids, distances) of the ``k`` regions closest to profile ``vector``, nearest first.
+
+        Only regions on ``level`` are searched (all levels if None);
+        ``exclude`` is a region id left out of the result.
+        """
+        candidates = self.members.get(level, np.empty(0, dtype="int64")) if level else np.flatnonzero(self.valid)
+        if exclude is not None:
+            candidates = candidates[candidates != exclude]
+        k = min(k, len(candidates))
+        if k == 0:
+            return candidates, np.empty(0)
+
+        squared = self.norms[candidates] - 2 * (self.profile[candidates] @ vector) + vector @ vector
+        nearest = np.argpartition(squared, k - 1)[:k]
+        nearest = nearest[np.argsort(squared[nearest], kind="stable")]
+        return candidates[nearest], np.sqrt(np.maximum(squared[nearest], 0))
+
+    def similar(self, region_id, k=10, level=None):
+        """Regions most like ``region_id``, on its own level unless ``level`` is given."""
+        return self.nearest(self.profile[region_id], k, level or self.levels[region_id], exclude=region_id)
+
+
+def similarity_index(df):
+    """Return the SimilarityIndex for ``df``, built once per loaded frame."""
+    return derived(df, "similarity_index", SimilarityIndex)
+
+
+# Index over the streamed Gemeinde cache: cache path -> ((workbook hash, mtime), (frame, index))
+_gemeinden = {}
+_lock = threading.Lock()
+
+
+def gemeinde_index(source=DATA_PATH):
+    """(frame, SimilarityIndex) of the streamed Gemeinde-level cache, or None if it has not been built.
+
+    Build the cache with ``python -m zensus22 compile --gemeinden``. Once
+    built, it is streamed again when the workbook changes, like the main
+    cache. Query it with a profile from the main frame's index, e.g.
+    ``index.nearest(main.profile[region_id], level="Gemeinde")``.
+    """
+    from zensus22.columnar import source_hash
+    from zensus22.stream import gemeinde_cache_path, load_gemeinden, stream_to_cache
+
+    path = gemeinde_cache_path(source)
+    if not path.exists():
+        return None
+    digest = dataset_version(source)
+    with _lock:
+        entry = _gemeinden.get(path)
+        if entry is None or entry[0] != (digest, path.stat().st_mtime_ns):
+            if source_hash(path) != digest:
+                stream_to_cache(source, path)
+            df = load_gemeinden(path)
+            entry = _gemeinden[path] = ((digest, path.stat().st_mtime_ns), (df, SimilarityIndex(df)))
+        return entry[1]
@@ -0,0 +1,147 @@
+# Streaming reader: workbook rows -> columnar cache in bounded chunks (for Gemeinde-level data)
+
+import math
+import os
+from pathlib import Path
+
+import pyarrow as pa
+
+from zensus22.columnar import _attach, _metadata
+from zensus22.hierarchy import KEY_COLUMNS
+from zensus22.loader import COUNT_PREFIXES, DATA_PATH, METRIC_COLUMNS, REGION_LEVELS, _content_hash
+
+GEMEINDE = "Gemeinde"
+
+# Levels kept by the streaming reader unless told otherwise
+STREAM_LEVELS = REGION_LEVELS + [GEMEINDE]
+
+CHUNK_SIZE = 5000
+
+
+# Count columns are written as uint32: the smallest type is not known before
+# the last row, and uint32 holds every census count (Germany has ~43 million apartments)
+COUNT_TYPE = pa.uint32()
+
+
+def _number(value):
+    # Suppressed cells ("-", "/") and blanks become NaN
+    if isinstance(value, bool):
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    return math.nan
+
+
+def _key(value):
+    return None if value is None else str(value)
+
+
+def _count(value):
+    # Suppressed cells and blanks become missing values
+    number = _number(value)
+    return None if math.isnan(number) else round(number)
+
+
+def _projection(header, columns):
+    if columns is None:
+        columns = [c for c in header
+                   if c in KEY_COLUMNS or c in METRIC_COLUMNS or (c and c.startswith(COUNT_PREFIXES))]
+    missing = [c for c in ["Name", "Regionalebene"] + list(columns) if c not in header]
+    if missing:
+        raise KeyError(f"Columns not in workbook: {missing}")
+    return [c for c in columns if c not in ("Name", "Regionalebene")]
+
+
+def iter_batches(path=DATA_PATH, levels=STREAM_LEVELS, columns=None, chunk_size=CHUNK_SIZE):
+    """Yield Arrow record batches of at most ``chunk_size`` rows.
+
+    The sheet is read row by row in openpyxl's read-only mode; rows outside
+    ``levels`` are dropped and only ``columns`` (default: region key, metrics
+    and count columns) are kept, so memory is bounded by the chunk size.
+    Output columns: Region, Regionalebene, then the projected columns (key
+    columns as strings, count columns as uint32 with missing values,
+    metrics and other columns float64).
+    """
+    import openpyxl
+
+    levels = set(levels)
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(c) if c is not None else None for c in next(rows)]
+        projected = _projection(header, columns)
+
+        name_i, level_i = header.index("Name"), header.index("Regionalebene")
+        positions = [header.index(c) for c in projected]
+        types = [pa.string() if c in KEY_COLUMNS else COUNT_TYPE if c.startswith(COUNT_PREFIXES) else pa.float64()
+                 for c in projected]
+        convert = [_key if t == pa.string() else _count if t == COUNT_TYPE else _number for t in types]
+
+        schema = pa.schema([("Region", pa.string()), ("Regionalebene", pa.string())] + list(zip(projected, types)))
+
+        def batch(buffers):
+            return pa.RecordBatch.from_arrays([pa.array(b, type=f.type) for b, f in zip(buffers, schema)],
+                                              schema=schema)
+
+        buffers = [[] for _ in schema]
+        for row in rows:
+            level = row[level_i]
+            if level not in levels:
+                continue
+            name = row[name_i]
+            buffers[0].append("Germany" if name == "Deutschland" else name)
+            buffers[1].append(level)
+            for buf, pos, to_value in zip(buffers[2:], positions, convert):
+                buf.append(to_value(row[pos]))
+            if len(buffers[0]) >= chunk_size:
+                yield batch(buffers)
+                buffers = [[] for _ in schema]
+        # Last (possibly empty) batch, so the schema is known even without matching rows
+        yield batch(buffers)
+    finally:
+        workbook.close()
+
+
+def gemeinde_cache_path(path=DATA_PATH):
+    """Location of the streamed cache of ``path``: data/.cache/<stem>_gemeinden.feather"""
+    path = Path(path)
+    return path.parent / ".cache" / f"{path.stem}_gemeinden.feather"
+
+
+def stream_to_cache(path=DATA_PATH, out=None, levels=STREAM_LEVELS, columns=None, chunk_size=CHUNK_SIZE):
+    """Write the filtered, projected rows of ``path`` chunk by chunk into an Arrow IPC (Feather) file.
+
+    Like the columnar cache, the file records the workbook's SHA-256 and the
+    cache version in its schema metadata (see ``columnar.source_hash``).
+    """
+    path = Path(path)
+    out = Path(out) if out else gemeinde_cache_path(path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(f".{os.getpid()}.tmp")
+    metadata = _metadata(_content_hash(path))
+
+    writer = None
+    rows = 0
+    try:
+        for batch in iter_batches(path, levels, columns, chunk_size):
+            if writer is None:
+                writer = pa.ipc.new_file(str(tmp), batch.schema.with_metadata(metadata))
+            if batch.num_rows:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        writer.close()
+        writer = None
+        os.replace(tmp, out)
+    finally:
+        if writer is not None:
+            writer.close()
+        tmp.unlink(missing_ok=True)
+    return out, rows
+
+
+def load_gemeinden(path=None):
+    """Memory-mapped frame written by ``stream_to_cache`` with categorical region columns."""
+    _, df = _attach(path or gemeinde_cache_path())
+    for col in ["Region", "Regionalebene"]:
+        df[col] = df[col].astype("category")
+    return df
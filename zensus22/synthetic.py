@@ -0,0 +1,59 @@
+# Synthetic workbooks shaped like Data_wohnungen.xlsx, for benchmarks at larger region counts
+
+import numpy as np
+import pandas as pd
+
+from zensus22.charts import ALL_COLUMNS
+from zensus22.loader import METRIC_COLUMNS, REGION_LEVELS
+from zensus22.stream import GEMEINDE
+
+BUND, LAND, KREIS = REGION_LEVELS
+
+# Real release: 16 Länder and 400 Kreise
+LAENDER = 16
+KREISE_PER_LAND = 25
+
+
+def synthetic_frame(scale=1, gemeinden_per_kreis=0, suppressed=0.02, seed=0):
+    """Raw frame with the workbook's columns; ``scale`` multiplies the number of Kreise.
+
+    A share ``suppressed`` of count cells is published as "-" or "/" like in
+    the census. With ``gemeinden_per_kreis`` Gemeinde rows are added too.
+    """
+    rng = np.random.default_rng(seed)
+    kreise = int(round(KREISE_PER_LAND * scale))
+
+    keys, names, levels = ["000000000000"], ["Deutschland"], [BUND]
+    for land in range(1, LAENDER + 1):
+        keys.append(f"{land:02d}0000000000")
+        names.append(f"Land {land:02d}")
+        levels.append(LAND)
+        for kreis in range(1, kreise + 1):
+            # 12-digit keys; Kreise beyond 999 per Land (large scales) continue in digits 6-7
+            kreis_key = f"{land:02d}{kreis % 1000:03d}{kreis // 1000:02d}"
+            keys.append(f"{kreis_key}00000")
+            names.append(f"Kreis {land:02d}-{kreis:04d}")
+            levels.append(KREIS)
+            for gemeinde in range(1, gemeinden_per_kreis + 1):
+                keys.append(f"{kreis_key}{gemeinde:05d}")
+                names.append(f"Gemeinde {land:02d}-{kreis:04d}-{gemeinde:03d}")
+                levels.append(GEMEINDE)
+
+    n = len(keys)
+    df = pd.DataFrame({"ARS": keys, "Name": names, "Regionalebene": levels})
+    df["QMMIETE"] = rng.uniform(5, 16, n).round(2)
+    df["LEQ"] = rng.uniform(1, 12, n).round(1)
+    df["ETQ"] = rng.uniform(15, 75, n).round(1)
+    df["FLAECHE"] = rng.uniform(55, 120, n).round(1)
+
+    counts = rng.integers(0, 200_000, size=(n, len(ALL_COLUMNS))).astype(object)
+    counts[rng.random(counts.shape) < suppressed / 2] = "-"
+    counts[rng.random(counts.shape) < suppressed / 2] = "/"
+    df = pd.concat([df, pd.DataFrame(counts, columns=ALL_COLUMNS)], axis=1)
+    return df[["ARS", "Name", "Regionalebene"] + METRIC_COLUMNS + ALL_COLUMNS]
+
+
+def write_workbook(path, scale=1, **kwargs):
+    """Write a synthetic workbook to ``path`` and return the path."""
+    synthetic_frame(scale, **kwargs).to_excel(path, index=False)
+    return path
@@ -0,0 +1,164 @@
+# Per-stage timing of a script run: wall time, allocated memory and chart payload bytes
+
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+# ZENSUS_TIMING=1 records every run (aggregated for /metrics and logged as JSON);
+# otherwise only runs opened with ?diagnostics=1 are recorded, for the panel
+ENABLED = os.environ.get("ZENSUS_TIMING", "") not in ("", "0")
+QUERY_PARAM = "diagnostics"
+
+log = logging.getLogger("zensus22.timing")
+
+_current = ContextVar("zensus22_timing", default=None)
+_NULL = nullcontext()
+
+# Process totals: (stage, chart) -> [count, seconds, allocated bytes]; chart -> last payload bytes
+_totals = {}
+_payloads = {}
+_lock = threading.Lock()
+_tracing = 0
+
+# Startup phases of this process, first measurement only: phase -> seconds
+_startup = {}
+
+
+@dataclass
+class Timing:
+    """One measured stage."""
+
+    stage: str
+    chart: str = None
+    seconds: float = 0.0
+    alloc_bytes: int = None
+    payload_bytes: int = None
+
+
+@dataclass
+class Recorder:
+    """Timings of one script run, in the order the stages finished."""
+
+    memory: bool = True
+    timings: list = field(default_factory=list)
+
+    @contextmanager
+    def stage(self, name, chart=None):
+        timing = Timing(name, chart)
+        if self.memory:
+            _trace(1)
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            timing.seconds = time.perf_counter() - start
+            if self.memory:
+                timing.alloc_bytes = max(0, tracemalloc.get_traced_memory()[1] - before)
+                _trace(-1)
+            self.timings.append(timing)
+
+    def rows(self):
+        return [vars(t) for t in self.timings]
+
+
+def _trace(delta):
+    # tracemalloc is process-wide; keep it on only while some stage measures memory
+    global _tracing
+    with _lock:
+        _tracing += delta
+        if delta > 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif _tracing == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def begin(enabled=False, memory=True, replace=False):
+    """Start recording the current run if ``enabled`` or ZENSUS_TIMING is set; returns the Recorder or None.
+
+    Returns None as well inside a run that is already being recorded (e.g. a
+    fragment during a full rerun); its stages go to the outer recorder.
+    ``replace`` starts a new recording regardless: the top of a script passes
+    it, because a run interrupted by a rerun never reaches its ``end()`` and
+    Streamlit runs a session's reruns in the same thread.
+    """
+    if replace:
+        _current.set(None)
+    if _current.get() is not None or not (enabled or ENABLED):
+        return None
+    recorder = Recorder(memory=memory)
+    _current.set(recorder)
+    return recorder
+
+
+def end(recorder):
+    """Add the run to the process totals and log it; no-op for None."""
+    if recorder is None or _current.get() is not recorder:
+        return
+    _current.set(None)
+    with _lock:
+        for t in recorder.timings:
+            entry = _totals.setdefault((t.stage, t.chart), [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += t.seconds
+            entry[2] += t.alloc_bytes or 0
+            if t.payload_bytes is not None:
+                _payloads[t.chart] = t.payload_bytes
+    if ENABLED:
+        log.info(json.dumps({"event": "run", "stages": recorder.rows()}))
+
+
+def stage(name, chart=None):
+    """Context manager timing ``name``; yields a Timing, or None when not recording."""
+    recorder = _current.get()
+    if recorder is None:
+        return _NULL
+    return recorder.stage(name, chart)
+
+
+def startup(phase, seconds):
+    """Record how long startup ``phase`` (e.g. "import", "first_run") took; later calls are ignored."""
+    with _lock:
+        if phase in _startup:
+            return
+        _startup[phase] = seconds
+    if ENABLED:
+        log.info(json.dumps({"event": "startup", "phase": phase, "seconds": seconds}))
+
+
+def _labels(stage, chart):
+    labels = f'stage="{stage}"'
+    return labels + (f',chart="{chart}"' if chart else "")
+
+
+def prometheus():
+    """Process totals in the Prometheus text exposition format."""
+    with _lock:
+        totals = sorted(_totals.items(), key=lambda item: (item[0][0], item[0][1] or ""))
+        payloads = sorted(_payloads.items())
+        phases = list(_startup.items())
+    lines = ["# HELP zensus22_startup_seconds Time to import the app and to finish its first run in this process.",
+             "# TYPE zensus22_startup_seconds gauge"]
+    for phase, seconds in phases:
+        lines.append(f'zensus22_startup_seconds{{phase="{phase}"}} {seconds:.6f}')
+    lines += ["# HELP zensus22_stage_seconds Wall time per stage.",
+              "# TYPE zensus22_stage_seconds summary"]
+    for (stage, chart), (count, seconds, _) in totals:
+        lines.append(f"zensus22_stage_seconds_sum{{{_labels(stage, chart)}}} {seconds:.6f}")
+        lines.append(f"zensus22_stage_seconds_count{{{_labels(stage, chart)}}} {count}")
+    lines += ["# HELP zensus22_stage_alloc_bytes Memory allocated per stage (tracemalloc peak).",
+              "# TYPE zensus22_stage_alloc_bytes counter"]
+    for (stage, chart), (_, _, alloc) in totals:
+        lines.append(f"zensus22_stage_alloc_bytes_total{{{_labels(stage, chart)}}} {alloc}")
+    lines += ["# HELP zensus22_chart_payload_bytes Serialized size of the last figure sent per chart.",
+              "# TYPE zensus22_chart_payload_bytes gauge"]
+    for chart, size in payloads:
+        lines.append(f'zensus22_chart_payload_bytes{{chart="{chart}"}} {size}')
+    return "\n".join(lines) + "\n"